@@ -0,0 +1,94 @@
+"""
+Compares the request signers, both raw and as used by the bot from the event loop.
+Run from the root of the project:
+    python -m benchmarks.bench_signers [signatures]
+"""
+import asyncio
+import base64
+import os
+import sys
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519
+from bot.utils.signing import load_signer, SigningPool
+
+MESSAGE = os.urandom(512)
+CONCURRENCY = 16
+
+
+def generate_keys() -> dict[str, bytes]:
+    keys = {
+        "RSA-3072": rsa.generate_private_key(public_exponent=65537, key_size=3072),
+        "Ed25519": ed25519.Ed25519PrivateKey.generate(),
+    }
+    return {
+        name: key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        for name, key in keys.items()
+    }
+
+
+def bench_raw(pem: bytes, count: int) -> float:
+    signer = load_signer(pem)
+    start = time.perf_counter()
+    for _ in range(count):
+        signer.sign(MESSAGE)
+    return count / (time.perf_counter() - start)
+
+
+async def measure_loop(sign_cb, count: int) -> tuple[float, float]:
+    """
+    Signs count messages, CONCURRENCY at a time, while a ticker checks how late the event loop is.
+    :return: Signatures per second and the worst delay of the event loop, in ms.
+    """
+    max_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal max_lag
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - before - 0.001)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for i in range(0, count, CONCURRENCY):
+        await asyncio.gather(*[sign_cb() for _ in range(min(CONCURRENCY, count-i))])
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticker_task
+    return count / elapsed, max_lag * 1000
+
+
+async def bench_loop(pem: bytes, count: int) -> dict[str, tuple[float, float]]:
+    signer = load_signer(pem)
+
+    async def sign_inline():
+        return base64.b64encode(signer.sign(MESSAGE)).decode()
+
+    results = {"inline": await measure_loop(sign_inline, count)}
+    for processes in (False, True):
+        pool = SigningPool(pem, workers=2, processes=processes)
+        await pool.sign(MESSAGE)  # Start the workers
+        results["processes" if processes else "threads"] = \
+            await measure_loop(lambda: pool.sign(MESSAGE), count)
+        pool.shutdown()
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    for name, pem in generate_keys().items():
+        print(f"{name}")
+        print(f"  raw: {bench_raw(pem, count):,.0f} signatures/s")
+        for mode, (rate, lag) in asyncio.run(bench_loop(pem, count)).items():
+            print(f"  {mode}: {rate:,.0f} signatures/s, event loop blocked for up to {lag:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-keystroke latency of the submit_as autocomplete as the number of retro maps grows:
+the old approach (building the choices and running difflib on all of them every time)
+against the precomputed index.
+Run from the root of the project:
+    python -m benchmarks.bench_submit_as
+"""
+import random
+import string
+import time
+from difflib import SequenceMatcher
+from bot.utils.submitas import SubmitAsMatcher, submit_as_choices
+
+QUERY = "Nostalgia Pack / Monkey Meadow"
+SIZES = [50, 200, 1000, 5000]
+GAMES = ["Bloons TD 1/2/3", "Bloons TD 4", "Bloons TD 5", "Bloons TD Battles", "Bloons Monkey City"]
+
+
+def random_word() -> str:
+    return "".join(random.choices(string.ascii_lowercase, k=random.randint(3, 9))).title()
+
+
+def make_retro_maps(count: int) -> dict:
+    retro_maps = {game: {"Beginner": [], "Intermediate": [], "Advanced": []} for game in GAMES}
+    for i in range(count):
+        name = "Monkey Meadow" if i == count // 2 else " ".join(random_word() for _ in range(random.randint(1, 3)))
+        retro_maps[random.choice(GAMES)][random.choice(["Beginner", "Intermediate", "Advanced"])] \
+            .append({"id": i, "name": name})
+    return retro_maps
+
+
+FORMATS = [
+    {"id": 1, "name": "Maplist", "proposed_difficulties": ["Top 3", "Top 10", "#11 ~ 20", "#21 ~ 30", "#31 ~ 40"]},
+    {"id": 51, "name": "Expert List", "proposed_difficulties": ["Casual", "Medium", "High", "True", "Extreme"]},
+    {"id": 52, "name": "Best of the Best", "proposed_difficulties": ["Beginner", "Intermediate", "Advanced"]},
+]
+
+
+def old_autocomplete(retro_maps: dict, current: str) -> list:
+    choices = submit_as_choices(retro_maps, FORMATS)
+    scored = [(*c, SequenceMatcher(None, c[0], current).ratio()) for c in choices]
+    return sorted(scored, key=lambda x: x[-1], reverse=True)[:10]
+
+
+def per_keystroke(autocomplete) -> float:
+    """:return: Average latency of typing QUERY one character at a time, in microseconds."""
+    start = time.perf_counter()
+    for i in range(1, len(QUERY)+1):
+        autocomplete(QUERY[:i])
+    return (time.perf_counter() - start) / len(QUERY) * 1e6
+
+
+def main():
+    random.seed(0)
+    print(f"{'retro maps':>10} | {'difflib':>12} | {'index':>10} | {'index build':>12}")
+    for size in SIZES:
+        retro_maps = make_retro_maps(size)
+        old = per_keystroke(lambda q: old_autocomplete(retro_maps, q))
+
+        matcher = SubmitAsMatcher()
+        start = time.perf_counter()
+        matcher.update(retro_maps, FORMATS)
+        build = (time.perf_counter() - start) * 1e6
+        new = per_keystroke(lambda q: (matcher.update(retro_maps, FORMATS), matcher.match(q)))
+
+        print(f"{size:>10} | {old:>10.0f}us | {new:>8.0f}us | {build:>10.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,11 @@ from bot.utils.emojis import EmjPlacements
 from bot.utils.decos import autodoc
 from bot.types import Format, LbType
 from bot.utils.requests.maplist import get_leaderboard
-from bot.views import VPaginateList
-from bot.utils.formulas import get_page_idxs
+from bot.views import VPersistentList
+from bot.utils.formulas import get_page_idxs, get_page_rows
+from bot.utils.pagination import PaginatedSource, paginated_sources, register_source
+from bot.utils.http import prefetch
+from typing import get_args
 
 
 row_template = "{emoji} `{name: <20}`  |  `{score: <5,}`"
@@ -28,6 +31,25 @@ class LeaderboardCog(CogBase):
 
     def __init__(self, bot: commands.Bot) -> None:
         super().__init__(bot)
+        # Params: index of the format & of the leaderboard type
+        register_source(PaginatedSource(
+            "leaderboard",
+            lambda params, pages: self.request_pages(
+                get_args(LbType)[int(params[1])],
+                get_args(Format)[int(params[0])],
+                pages,
+            ),
+            lambda _params, entries: self.create_lb_message(entries),
+            items_page,
+            items_page_srv,
+            list_key="entries",
+            prefetch_cb=lambda params, page: prefetch(
+                get_leaderboard,
+                get_args(LbType)[int(params[1])],
+                get_args(Format)[int(params[0])],
+                page,
+            ),
+        ))
 
     @discord.app_commands.command(
         name="leaderboard",
@@ -67,21 +89,12 @@ class LeaderboardCog(CogBase):
             )
 
         client_pages = math.ceil(lb_pages[req_page_start]["total"] / items_page)
-        view = VPaginateList(
-            interaction,
-            client_pages,
-            page,
-            lb_pages,
-            items_page,
-            items_page_srv,
-            lambda pages: self.request_pages(lb_type, game_format, pages),
-            self.create_lb_message,
-            list_key="entries",
-        )
+        params = [str(get_args(Format).index(game_format)), str(get_args(LbType).index(lb_type))]
         await interaction.edit_original_response(
-            content=self.create_lb_message(view.get_needed_rows(page, lb_pages)),
-            view=view,
+            content=self.create_lb_message(get_page_rows(page, lb_pages, items_page, items_page_srv)),
+            view=VPersistentList("leaderboard", params, page, client_pages, interaction.user.id),
         )
+        paginated_sources["leaderboard"].read_ahead(params, page, client_pages)
 
     @staticmethod
     async def request_pages(
@@ -1,17 +1,16 @@
 import asyncio
 import discord
 import math
-from discord.ext import commands
+import time
+from discord.ext import commands, tasks
 from bot.utils.requests.maplist import (
     get_maplist_map,
     get_map_completions,
     get_maplist_config,
-    get_experts,
-    get_maplist,
-    get_formats,
-    search_maps,
-    get_botb,
-    get_nostalgia_pack,
+    get_format_registry,
+    suggest_maps,
+    sync_catalog,
+    get_catalog_list,
 )
 from bot.cogs.CogBase import CogBase
 from bot.utils.decos import autodoc
@@ -24,9 +23,29 @@ from bot.utils.formulas import points
 from bot.utils.colors import EmbedColor
 from bot.utils.formulas import get_page_idxs
 from bot.utils.misc import image_formats
-from typing import get_args
+from typing import get_args, Any
+from datetime import datetime
 from collections.abc import Callable
 from bot.utils.discordutils import composite_views
+from bot.utils.cache import is_stale
+from bot.utils.autocomplete import supersedable
+import bot.utils.http
+from bot.utils.catalog import catalog
+from bot.utils.viewmanager import view_manager
+
+stale_notice = "-# ⚠️ Couldn't reach the Maplist, this data might be outdated!"
+# The catalog is synced every 10 minutes, if it's older than this it failed to sync a few times.
+catalog_outdated_after = 60 * 30
+
+
+def catalog_notice(maps: list[dict], synced_at: float | None) -> str | None:
+    """Tells how fresh a list from the catalog is."""
+    if synced_at is None:
+        return stale_notice if is_stale(maps) else None
+    notice = f"-# Last updated <t:{int(synced_at)}:R>"
+    if time.time() - synced_at > catalog_outdated_after:
+        notice = f"{stale_notice}\n{notice}"
+    return notice
 
 
 class MapInfoCog(CogBase):
@@ -44,6 +63,29 @@ class MapInfoCog(CogBase):
     def __init__(self, bot: commands.Bot) -> None:
         super().__init__(bot)
 
+    async def cog_load(self) -> None:
+        await super().cog_load()
+        self.task_sync_catalog.start()
+
+    async def cog_unload(self) -> None:
+        await super().cog_unload()
+        self.task_sync_catalog.stop()
+
+    async def serialize_state(self) -> dict[str, Any]:
+        return {"catalog": catalog.dump()}
+
+    async def parse_state(self, saved_at: datetime, state: dict[str, Any]) -> None:
+        # List commands can work right away, even if the API is down
+        catalog.load(state.get("catalog", {}))
+
+    @tasks.loop(minutes=10)
+    async def task_sync_catalog(self) -> None:
+        await sync_catalog()
+
+    @task_sync_catalog.before_loop
+    async def before_sync_catalog(self) -> None:
+        await bot.utils.http.ready.wait()
+
     @discord.app_commands.command(
         name="map",
         description="Information about a map",
@@ -89,10 +131,11 @@ class MapInfoCog(CogBase):
     @cmd_map.autocomplete("map_id")
     @cmd_lcc.autocomplete("map_id")
     @cmd_r6_start.autocomplete("map_id")
+    @supersedable("map_id")
     async def autocomplete_map_id(self, _i: discord.Interaction, current: str) -> list[discord.app_commands.Choice[str]]:
         return [
             discord.app_commands.Choice(name=map_data["name"], value=map_data["code"])
-            for map_data in await search_maps(current)
+            for map_data in await suggest_maps(current)
         ]
 
     @discord.app_commands.command(
@@ -126,8 +169,8 @@ class MapInfoCog(CogBase):
                                           "forced, don't hesitate to go all out to beat these maps. _Good luck..._"),
         ]
         diffval = labels.index(difficulty)
-        experts = await get_experts()
-        experts = [exp for exp in experts if exp["format_idx"] == diffval]
+        all_experts, synced_at = await get_catalog_list("experts")
+        experts = [exp for exp in all_experts if exp["format_idx"] == diffval]
 
         def create_message(entries: list[dict]) -> discord.Embed:
             content = "\n".join([
@@ -146,6 +189,7 @@ class MapInfoCog(CogBase):
             interaction,
             experts,
             create_message,
+            notice=catalog_notice(all_experts, synced_at),
         )
 
     @discord.app_commands.command(
@@ -159,8 +203,8 @@ class MapInfoCog(CogBase):
             hide: bool = False,
     ) -> None:
         await interaction.response.defer(ephemeral=hide)
-        maplist, cfg = await asyncio.gather(
-            get_maplist(),
+        (maplist, synced_at), cfg = await asyncio.gather(
+            get_catalog_list("maplist"),
             get_maplist_config(),
         )
 
@@ -181,6 +225,7 @@ class MapInfoCog(CogBase):
             interaction,
             maplist,
             create_message,
+            notice=stale_notice if is_stale(cfg) else catalog_notice(maplist, synced_at),
         )
 
     @discord.app_commands.command(
@@ -215,13 +260,14 @@ class MapInfoCog(CogBase):
         ]
         diffval = labels.index(difficulty)
         if diffval != 3:
-            botb_list = await get_botb(diffval)
+            botb_list, synced_at = await get_catalog_list(f"botb:{diffval}")
         else:
-            expert, extreme = await asyncio.gather(
-                get_botb(3),
-                get_botb(4),
+            (expert, _s), (extreme, _s) = await asyncio.gather(
+                get_catalog_list("botb:3"),
+                get_catalog_list("botb:4"),
             )
             botb_list = [*expert, *extreme]
+            synced_at = catalog.synced_at("botb:3", "botb:4")
 
         def create_message(entries: list[dict]) -> discord.Embed:
             extr_emoji = f'  {EmjIcons.botb_extreme}'
@@ -241,6 +287,7 @@ class MapInfoCog(CogBase):
             interaction,
             botb_list,
             create_message,
+            notice=catalog_notice(botb_list, synced_at),
         )
 
     @discord.app_commands.command(
@@ -272,7 +319,8 @@ class MapInfoCog(CogBase):
             (EmjIcons.np_btdb2, "bloons_td_battles_2"),
         ]
         diffval = labels.index(game)
-        nostalgia_pack = await get_nostalgia_pack(diffval)
+        nostalgia_pack, synced_at = await get_catalog_list(f"nostalgia_pack:{diffval}")
+        notice = catalog_notice(nostalgia_pack, synced_at)
 
         def create_message(entries: list[dict]) -> discord.Embed:
             category = entries[0]["format_idx"]["category"]["name"]
@@ -294,8 +342,9 @@ class MapInfoCog(CogBase):
                 url=f"{WEB_BASE_URL}/nostalgia-pack?game={diffq}&category={category_q}",
             )
 
-        nostalgia_pack.sort(
-            key=lambda x: (x["format_idx"]["category"]["id"], x["format_idx"]["sort_order"])
+        nostalgia_pack = sorted(
+            nostalgia_pack,
+            key=lambda x: (x["format_idx"]["category"]["id"], x["format_idx"]["sort_order"]),
         )
 
         maps_by_category = {}
@@ -311,6 +360,7 @@ class MapInfoCog(CogBase):
             pages,
             placeholder=lambda page: pages[page][1],
             autoload=False,
+            payloads=[nostalgia_pack],
         )
 
         for category, maps in maps_by_category.items():
@@ -332,13 +382,13 @@ class MapInfoCog(CogBase):
             pages.append((None, category, msg_content))
 
         view_tabs.load_items()
+        view = composite_views(await pages[0][2].view(), view_tabs)
         await interaction.edit_original_response(
+            content=notice,
             embeds=await pages[0][2].embeds(),
-            view=composite_views(
-                await pages[0][2].view(),
-                view_tabs,
-            ),
+            view=view,
         )
+        view_manager.attach(interaction, view, view_tabs.payloads)
 
     @staticmethod
     async def send_list(
@@ -346,6 +396,7 @@ class MapInfoCog(CogBase):
             map_list: list[dict],
             create_message: Callable[[list[dict]], discord.Embed],
             items_page: int = 10,
+            notice: str | None = None,
     ) -> None:
         paginate_view = VPaginateList(
             interaction,
@@ -359,9 +410,11 @@ class MapInfoCog(CogBase):
             list_key=None,
         )
         await interaction.edit_original_response(
+            content=notice,
             embed=create_message(paginate_view.get_needed_rows(1, {1: map_list})),
             view=paginate_view,
         )
+        view_manager.attach(interaction, paginate_view, [map_list])
 
     @staticmethod
     async def send_map_info_messages(
@@ -372,12 +425,13 @@ class MapInfoCog(CogBase):
         map_data, ml_config, ml_formats = await asyncio.gather(
             get_maplist_map(map_id),
             get_maplist_config(),
-            get_formats(),
+            get_format_registry(),
         )
-        visible_formats = [f["id"] for f in ml_formats if not f["hidden"]]
+        visible_formats = ml_formats.visible
+        stale = is_stale(map_data) or is_stale(ml_config)
 
         if map_data["map_preview_url"].startswith("https://data.ninjakiwi.com"):
-            map_data["map_preview_url"] = NK_PREVIEW_PROXY(map_data["code"])
+            map_data = {**map_data, "map_preview_url": NK_PREVIEW_PROXY(map_data["code"])}
 
         max_lcc = map_data["lccs"][0] if len(map_data["lccs"]) else None
         for lcc in map_data["lccs"]:
@@ -400,7 +454,13 @@ class MapInfoCog(CogBase):
 
         views_to_load = []
 
-        comp_page_view = VPages(interaction, pages, current_page=len(select_pages), autoload=False)
+        comp_page_view = VPages(
+            interaction,
+            pages,
+            current_page=len(select_pages),
+            autoload=False,
+            payloads=[map_data],
+        )
         pages.append(
             (
                 EmjMedals.win, "Completions",
@@ -418,17 +478,21 @@ class MapInfoCog(CogBase):
 
         content = await pages[idx][2].content()
         embeds = await pages[idx][2].embeds()
+        if stale:
+            content = stale_notice if content is None else f"{stale_notice}\n{content}"
+        pages_view = VPages(interaction, pages, payloads=[map_data])
         await interaction.edit_original_response(
             content=content,
             embeds=embeds if embeds else [],
-            view=VPages(interaction, pages),
+            view=pages_view,
         )
+        view_manager.attach(interaction, pages_view, pages_view.payloads)
 
     @staticmethod
     def get_map_message(
             map_data: dict,
             ml_config: dict,
-            visible_formats: list[int],
+            visible_formats: set[int],
     ) -> MessageContent:
         description = ""
         if len(map_data["aliases"]):
@@ -617,7 +681,9 @@ class MapInfoCog(CogBase):
                 build_message,
                 additional_views=[pages_view],
                 list_key="completions",
+                prefetch_cb=lambda pg: bot.utils.http.prefetch(get_map_completions, map_data["code"], pg),
             )
+            view.read_ahead(1)
             return MessageContent(
                 content=view.message_on_page(1),
                 view=view,
@@ -2,6 +2,10 @@ import discord
 from discord.ext import commands
 from typing import Literal
 import config
+import bot.utils.http
+from bot.utils.autocomplete import autocompletes
+from bot.utils.viewmanager import view_manager
+from bot.utils.navigation import navigation
 
 
 SUCCESS_REACTION = '\N{THUMBS UP SIGN}'
@@ -20,6 +24,7 @@ class OwnerCog(commands.Cog, name="owner"):
 
     sync: syncs the command tree
     tasks: checks all running bot tasks
+    httpstats: shows stats about requests to the APIs
     cogs: lists loaded cogs
     cog ld: loads a cog
     cog rm: unloads a cog
@@ -54,6 +59,59 @@ class OwnerCog(commands.Cog, name="owner"):
                 msg += f"  - {'🟢' if tasks[cog_name][tname] else '🔴'} {tname}\n"
         await ctx.send(msg)
 
+    @commands.command()
+    @is_owner()
+    async def httpstats(self, ctx: discord.ext.commands.Context) -> None:
+        stats = bot.utils.http.stats()
+        msg = "**__Coalesced requests:__**\n"
+        for name, (calls, collapsed) in sorted(stats["coalesced"].items()):
+            msg += f"- `{name}`: {collapsed}/{calls} calls collapsed, " \
+                   f"{stats['cancelled'].get(name, 0)} cancelled\n"
+        mem = stats["memory_cache"]
+        msg += "**__Memory cache:__**\n" \
+               f"- {mem['entries']} entries, {mem['bytes'] / 1024:.1f}KB\n" \
+               f"- {mem['hits']} hits, {mem['stale_hits']} stale hits, {mem['misses']} misses, " \
+               f"{mem['evictions']} evictions\n"
+        pages = stats["page_store"]
+        msg += "**__Page store:__**\n" \
+               f"- {pages['entries']} pages, {pages['bytes'] / 1024:.1f}KB\n" \
+               f"- {pages['hits']} hits, {pages['stale_hits']} stale hits, {pages['misses']} misses, " \
+               f"{pages['evictions']} evictions\n"
+        reval = stats["revalidation"]
+        msg += "**__Conditional requests:__**\n" \
+               f"- {reval['not_modified']}/{reval['requests']} not modified, " \
+               f"{reval['bytes_saved'] / 1024:.1f}KB not downloaded again\n"
+        if stats["prefetch"]:
+            msg += "**__Prefetching:__**\n"
+        for name, prefetch in sorted(stats["prefetch"].items()):
+            msg += f"- `{name}`: {prefetch['hits']}/{prefetch['started']} prefetches used, " \
+                   f"{prefetch['wasted']} wasted, {prefetch['skipped']} skipped\n"
+        msg += "**__Sessions:__**\n"
+        for name, session in stats["sessions"].items():
+            msg += f"- {'🔴' if session['open'] else '🟢'} **{name}:** {session['retries']} retries, " \
+                   f"circuit opened {session['times_opened']} times, {session['rejected']} requests rejected\n"
+        if signing := stats["signing"]:
+            msg += "**__Signing:__**\n" \
+                   f"- {signing['algorithm']} in {signing['pool']}: {signing['signatures']} signatures, " \
+                   f"{signing['avg_ms']:.1f}ms on average\n"
+        msg += "**__Autocompletes:__**\n"
+        for field, (lookups, cancelled) in sorted(autocompletes.stats().items()):
+            msg += f"- `{field}`: {cancelled}/{lookups} lookups superseded\n"
+        await ctx.send(msg)
+
+    @commands.command()
+    @is_owner()
+    async def views(self, ctx: discord.ext.commands.Context) -> None:
+        stats = view_manager.stats()
+        nav = navigation.stats()
+        await ctx.send(
+            f"**__Live views:__** {stats['views']}/{view_manager.max_views}, "
+            f"holding {stats['bytes'] / 1024:.1f}KB of payloads\n"
+            f"- {stats['retired']} retired after being replaced\n"
+            f"- {stats['evicted']} evicted for being the least recently used\n"
+            f"- {nav['superseded']}/{nav['navigations']} navigations folded into a later one"
+        )
+
     @commands.command()
     @is_owner()
     async def sync(self, ctx: discord.ext.commands.Context, where: None | Literal[".", "mlist"] = None) -> None:
@@ -7,25 +7,28 @@ from bot.utils.decos import autodoc
 from bot.utils.handlers import handle_error
 from bot.utils.requests.maplist import (
     submit_map,
-    get_maplist_user,
+    get_submitter,
     submit_run,
     get_maplist_map,
     accept_run,
     reject_run,
     reject_map,
-    search_maps,
-    get_formats,
+    suggest_maps,
+    get_format_registry,
     get_retro_maps,
 )
-from bot.views import VRulesAccept, VRunFormatSelect
+from bot.views import VRulesAccept, VRunFormatSelect, VContinue
 from bot.views.modals import MMapSubmission, MRunSubmission
-from bot.exceptions import BadRequest, MaplistResNotFound
+from bot.exceptions import BadRequest, MaplistResNotFound, DeadlineExceeded
+from bot.utils import deadline
+from bot.utils.autocomplete import supersedable
+from bot.utils.submitas import SubmitAsMatcher
+from bot.utils.viewmanager import view_manager
 from config import WEB_BASE_URL
 from bot.utils.misc import image_formats, max_upload_size_mb
 from bot.utils.models import MessageContent
-from collections.abc import Awaitable
+from collections.abc import Awaitable, Callable
 from typing import Any
-from difflib import SequenceMatcher
 
 list_rules_url = "https://discord.com/channels/1162188507800944761/1162193272320569485/1272011602228678747"
 exp_rules_url = "https://discord.com/channels/1162188507800944761/1250611476444479631/1253260417292308552"
@@ -77,6 +80,13 @@ ctxm_accept_submission.error(handle_error)
 
 @discord.app_commands.context_menu(name="Reject Submission")
 async def ctxm_reject_submission(interaction: discord.Interaction, message: discord.Message):
+    await reject_submission(interaction, message)
+
+
+ctxm_reject_submission.error(handle_error)
+
+
+async def reject_submission(interaction: discord.Interaction, message: discord.Message) -> None:
     async def reject_completion_submission():
         run_id = await check_submission(interaction, message)
         if not isinstance(run_id, int):
@@ -118,16 +128,16 @@ async def ctxm_reject_submission(interaction: discord.Interaction, message: disc
         await interaction.edit_original_response(content=response)
 
     if message.webhook_id:
-        formats = await get_formats()
-        for format_data in formats:
-            if format_data["run_submission_wh"] and \
-                    (match := re.match(r"https://discord.com/api/webhooks/(\d+)", format_data["run_submission_wh"])) and \
-                    int(match.group(1)) == message.webhook_id:
+        try:
+            with deadline.for_interaction(interaction):
+                formats = await get_format_registry()
+        except DeadlineExceeded:
+            return await SubmissionCog.send_continue(interaction, lambda i: reject_submission(i, message))
+        if webhook := formats.by_webhook.get(message.webhook_id):
+            _format_data, kind = webhook
+            if kind == "run":
                 return await reject_completion_submission()
-            if format_data["map_submission_wh"] and \
-                    (match := re.match(r"https://discord.com/api/webhooks/(\d+)", format_data["map_submission_wh"])) and \
-                    int(match.group(1)) == message.webhook_id:
-                return await reject_map_submission()
+            return await reject_map_submission()
 
     return await interaction.response.send_message(
         content="That's not a submission?",
@@ -135,9 +145,6 @@ async def ctxm_reject_submission(interaction: discord.Interaction, message: disc
     )
 
 
-ctxm_reject_submission.error(handle_error)
-
-
 class SubmissionCog(CogBase):
     help_descriptions = {
         "submit": {
@@ -156,6 +163,7 @@ class SubmissionCog(CogBase):
 
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
+        self.submit_as_matcher = SubmitAsMatcher()
         self.bot.tree.add_command(ctxm_accept_submission)
         self.bot.tree.add_command(ctxm_reject_submission)
 
@@ -164,6 +172,26 @@ class SubmissionCog(CogBase):
         self.bot.tree.remove_command(ctxm_accept_submission.name)
         self.bot.tree.remove_command(ctxm_reject_submission.name)
 
+    @staticmethod
+    async def send_continue(
+            interaction: discord.Interaction,
+            continue_cb: Callable[[discord.Interaction], Awaitable[None]],
+    ) -> None:
+        await interaction.response.send_message(
+            ephemeral=True,
+            content="The Maplist is taking a bit long to answer... press the button to continue!",
+            view=VContinue(interaction, continue_cb),
+        )
+
+    @staticmethod
+    def user_permissions(ml_user: dict, format_id: int) -> set[str]:
+        """Permissions a Maplist user has on a format."""
+        permissions = set()
+        for perms in ml_user["permissions"]:
+            if perms["format"] is None or perms["format"] == format_id:
+                permissions.update(perms["permissions"])
+        return permissions
+
     @staticmethod
     async def check_submission_proof(interaction: discord.Interaction, proof: discord.Attachment) -> bool:
         if proof is None:
@@ -215,6 +243,16 @@ class SubmissionCog(CogBase):
                 ephemeral=True,
             )
 
+        await self.submit_map(interaction, map_code, proof, format_id, proposed)
+
+    async def submit_map(
+            self,
+            interaction: discord.Interaction,
+            map_code: str,
+            proof: discord.Attachment | None,
+            format_id: int,
+            proposed: int,
+    ) -> None:
         def process_callback(interaction: discord.Interaction, notes: str):
             return self.process_map_subm(
                 interaction,
@@ -227,21 +265,23 @@ class SubmissionCog(CogBase):
 
         modal = MMapSubmission(process_callback)
 
-        # Note: this is an API call to the backend, it can only stay
-        # within the 3-second Discord threshold because it's local, otherwise
-        # it probably has to defer. But if it does, it can't show the modal.
+        # These are API calls to the backend which must be done before the modal is shown, and
+        # a modal can't be shown after deferring. If they take too long, the user can resume
+        # the command with a new interaction (and the responses will be cached by then).
         try:
-            ml_user = await get_maplist_user(interaction.user.id, no_load_oak=True)
-        except MaplistResNotFound:
-            ml_user = None
+            with deadline.for_interaction(interaction):
+                ml_user, formats = await asyncio.gather(
+                    get_submitter(interaction.user.id),
+                    get_format_registry(),
+                )
+        except DeadlineExceeded:
+            return await self.send_continue(
+                interaction,
+                lambda i: self.submit_map(i, map_code, proof, format_id, proposed),
+            )
 
         if ml_user:
-            permissions = set()
-            for perms in ml_user["permissions"]:
-                if perms["format"] is None or perms["format"] == format_id:
-                    permissions.update(perms["permissions"])
-
-            if "create:map_submission" not in permissions:
+            if "create:map_submission" not in self.user_permissions(ml_user, format_id):
                 return await interaction.response.send_message(
                     ephemeral=True,
                     content="You cannot submit maps to this list!",
@@ -254,21 +294,19 @@ class SubmissionCog(CogBase):
                 view=VRulesAccept(interaction, modal)
             )
 
-        formats = await get_formats()
-        for fmt in formats:
-            if fmt["id"] == format_id:
-                if fmt["map_submission_status"] == "open_chimps" and proof is None:
-                    return await interaction.response.send_message(
-                        ephemeral=True,
-                        content="⚠️ Map submissions in this list require a screenshot of someone beating CHIMPS mode "
-                                "in your map.\n\nSubmit the screenshot via the `proof` option when running this "
-                                "command!",
-                    )
-                if fmt["map_submission_status"] == "closed":
-                    return await interaction.response.send_message(
-                        ephemeral=True,
-                        content="This list is not currently accepting map submissions.",
-                    )
+        if format_id in formats.by_id:
+            if formats.by_id[format_id]["map_submission_status"] == "open_chimps" and proof is None:
+                return await interaction.response.send_message(
+                    ephemeral=True,
+                    content="⚠️ Map submissions in this list require a screenshot of someone beating CHIMPS mode "
+                            "in your map.\n\nSubmit the screenshot via the `proof` option when running this "
+                            "command!",
+                )
+            if format_id not in formats.open_maps:
+                return await interaction.response.send_message(
+                    ephemeral=True,
+                    content="This list is not currently accepting map submissions.",
+                )
 
         await interaction.response.send_modal(modal)
 
@@ -368,11 +406,12 @@ class SubmissionCog(CogBase):
 
     @cmd_submit_run.autocomplete("map_id")
     @cmd_submit_lcc.autocomplete("map_id")
+    @supersedable("map_id")
     async def autocomplete_map_id(self, _i: discord.Interaction, current: str) -> list[
         discord.app_commands.Choice[str]]:
         return [
             discord.app_commands.Choice(name=map_data["name"], value=map_data["code"])
-            for map_data in await search_maps(current)
+            for map_data in await suggest_maps(current)
         ]
 
     async def submit_run(
@@ -391,11 +430,33 @@ class SubmissionCog(CogBase):
                 return
 
         try:
-            map_id = map_id.upper()
-            ml_map = await get_maplist_map(map_id)
-        except MaplistResNotFound:
+            with deadline.for_interaction(interaction):
+                await self.prepare_run_submission(interaction, map_id, proofs, no_optimal_hero, black_border, lcc)
+        except DeadlineExceeded:
+            await self.send_continue(
+                interaction,
+                lambda i: self.submit_run(i, map_id, proofs, no_optimal_hero, black_border, lcc),
+            )
+
+    async def prepare_run_submission(
+            self,
+            interaction: discord.Interaction,
+            map_id: str,
+            proofs: list[discord.Attachment],
+            no_optimal_hero: bool,
+            black_border: bool,
+            lcc: bool,
+    ) -> None:
+        map_id = map_id.upper()
+        try:
+            ml_map, formats, ml_user = await asyncio.gather(
+                get_maplist_map(map_id),
+                get_format_registry(),
+                get_submitter(interaction.user.id),
+            )
+        except MaplistResNotFound as exc:
             return await interaction.response.send_message(
-                content="That map doesn't exist!",
+                content="That map doesn't exist!" + exc.formatted_suggestions(),
                 ephemeral=True,
             )
 
@@ -407,11 +468,9 @@ class SubmissionCog(CogBase):
             52: "botb_difficulty",
         }
 
-        formats = await get_formats()
         valid_formats = [
-            format_data for format_data in formats
-            if format_data["run_submission_status"] != "closed"
-                and not format_data["hidden"]
+            format_data for format_data in formats.formats
+            if format_data["id"] in formats.open_runs
                 and ml_map[format_keys[format_data["id"]]] is not None
         ]
 
@@ -445,12 +504,7 @@ class SubmissionCog(CogBase):
             def callback_wrapper(*args) -> Awaitable[Any]:
                 return process_callback(*args, format_id=format_id)
 
-            permissions = set()
-            if ml_user:
-                for perms in ml_user["permissions"]:
-                    if perms["format"] is None or perms["format"] == format_id:
-                        permissions.update(perms["permissions"])
-
+            permissions = self.user_permissions(ml_user, format_id) if ml_user else set()
             return MRunSubmission(
                 callback_wrapper,
                 is_lcc=lcc,
@@ -462,11 +516,6 @@ class SubmissionCog(CogBase):
                     ml_user is not None and "require:completion_submission:recording" in permissions
             )
 
-        try:
-            ml_user = await get_maplist_user(interaction.user.id, no_load_oak=True)
-        except MaplistResNotFound:
-            ml_user = None
-
         if len(valid_formats) == 1:
             next_step = modal_builder(valid_formats[0]["id"])
         else:
@@ -486,12 +535,14 @@ class SubmissionCog(CogBase):
         if isinstance(next_step, discord.ui.Modal):
             await interaction.response.send_modal(next_step)
         elif isinstance(next_step, MessageContent):
+            view = await next_step.view()
             await interaction.response.send_message(
                 ephemeral=True,
                 content=await next_step.content(),
                 embeds=await next_step.embeds(),
-                view=await next_step.view(),
+                view=view,
             )
+            view_manager.attach(interaction, view)
 
     @staticmethod
     async def process_run_submission(
@@ -530,29 +581,20 @@ class SubmissionCog(CogBase):
             )
 
     @cmd_submit_map.autocomplete("submit_as")
+    @supersedable("submit_as")
     async def autoc_submit_map_submit_as(
             self,
             _interaction: discord.Interaction,
             current: str,
     ) -> list[discord.app_commands.Choice[str]]:
         retro_maps, formats = await asyncio.gather(
-            get_retro_maps(),
-            get_formats(),
+            get_retro_maps(as_list=False),
+            get_format_registry(),
         )
-
-        choices = [
-            (11, f"Nostalgia Pack / {map_data['name']}", map_data["id"])
-            for map_data in retro_maps
-        ]
-        for format_data in formats:
-            if format_data["proposed_difficulties"]:
-                for i, choice_name in enumerate(format_data["proposed_difficulties"]):
-                    choices.append((format_data["id"], f"{format_data['name']} ~ {choice_name}", i))
-
-        choices = [(*c, SequenceMatcher(None, c[1], current).ratio()) for c in choices]
+        self.submit_as_matcher.update(retro_maps, formats.formats)
         return [
-            discord.app_commands.Choice(name=name, value=f"{format_id};{value}")
-            for format_id, name, value, score in sorted(choices, key=lambda x: x[-1], reverse=True)[:10]
+            discord.app_commands.Choice(name=name, value=value)
+            for name, value in self.submit_as_matcher.match(current)
         ]
 
 
@@ -10,13 +10,16 @@ from bot.utils.requests.maplist import (
     get_maplist_user,
     get_user_completions,
     set_oak,
-    get_formats,
+    get_format_registry,
     get_banner_medals_url,
 )
 from bot.utils.requests.ninjakiwi import get_btd6_user
 from bot.views import VPages, VPaginateList
 from bot.utils.models import MessageContent, LazyMessageContent
 from bot.exceptions import MaplistResNotFound
+from bot.utils.formats import FormatRegistry
+from bot.utils.viewmanager import view_manager
+import bot.utils.http
 from config import EMBED_CLR, WEB_BASE_URL
 from bot.utils.emojis import EmjMedals, EmjIcons, EmjPlacements, EmjMisc
 
@@ -82,7 +85,7 @@ class UserCog(CogBase):
 
         profile, formats = await asyncio.gather(
             self.fetch_user(user.id),
-            get_formats(),
+            get_format_registry(),
         )
 
         pages = [
@@ -92,7 +95,14 @@ class UserCog(CogBase):
         views_to_load = []
         if profile["medals"]["wins"] > 0:
             views_to_load.append(
-                VPages(interaction, pages, placeholder="Other user info", current_page=len(pages), autoload=False)
+                VPages(
+                    interaction,
+                    pages,
+                    placeholder="Other user info",
+                    current_page=len(pages),
+                    autoload=False,
+                    payloads=[profile],
+                )
             )
             pages.append((
                 EmjMedals.win, "Completions",
@@ -104,12 +114,13 @@ class UserCog(CogBase):
 
         pages_view = None
         if len(pages) > 1:
-            pages_view = VPages(interaction, pages, placeholder="Other user info")
+            pages_view = VPages(interaction, pages, placeholder="Other user info", payloads=[profile])
 
         await interaction.edit_original_response(
             embeds=await pages[0][2].embeds(),
             view=pages_view,
         )
+        view_manager.attach(interaction, pages_view, [profile])
 
     @staticmethod
     def get_completions_message(
@@ -171,7 +182,9 @@ class UserCog(CogBase):
                 build_message,
                 additional_views=[pages_view],
                 list_key="completions",
+                prefetch_cb=lambda pg: bot.utils.http.prefetch(get_user_completions, user.id, pg),
             )
+            view.read_ahead(1)
             return MessageContent(
                 content=view.message_on_page(1),
                 view=view,
@@ -184,7 +197,7 @@ class UserCog(CogBase):
             interaction: discord.Interaction,
             user: discord.User,
             profile: dict,
-            formats: list[dict],
+            formats: FormatRegistry,
     ) -> MessageContent:
         description = ""
         if len(profile["created_maps"]):
@@ -210,9 +223,9 @@ class UserCog(CogBase):
         embed.set_thumbnail(url=profile["avatarURL"] if profile["avatarURL"] else empty_profile["avatarURL"])
 
         for stats in sorted(profile["list_stats"], key=lambda x: x["format_id"]):
-            format_data = next(f for f in formats if f["id"] == stats["format_id"])
-            if format_data["hidden"]:
+            if stats["format_id"] not in formats.visible:
                 continue
+            format_data = formats.by_id[stats["format_id"]]
 
             something = True
             prf = stats["stats"]
@@ -2,6 +2,7 @@ import discord
 from config import APP_ID, GH_REPO, BOT_NAME, EMBED_CLR, WEB_BASE_URL
 from discord.ext import commands
 from bot.cogs.CogBase import CogBase
+from bot.utils.autocomplete import supersedable
 
 
 class UtilsCog(CogBase):
@@ -45,6 +46,7 @@ class UtilsCog(CogBase):
         await interaction.response.send_message(await cog.help_message(), ephemeral=True)
 
     @cmd_send_help_msg.autocomplete("module")
+    @supersedable("module")
     async def autoc_tag_tag_name(self,
                                  _interaction: discord.Interaction,
                                  current: str
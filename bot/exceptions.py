@@ -12,12 +12,18 @@ def stringify_errors(errors: dict[str, str]) -> str:
 
 
 class MaplistResNotFound(Exception):
-    def __init__(self, resource_name: str):
+    def __init__(self, resource_name: str, suggestions: list[str] | None = None):
         super().__init__()
         self.resource_name = resource_name
+        self.suggestions = suggestions if suggestions else []
 
     def formatted_exc(self) -> str:
-        return f"Couldn't find the {self.resource_name} you're looking for!"
+        return f"Couldn't find the {self.resource_name} you're looking for!" + self.formatted_suggestions()
+
+    def formatted_suggestions(self) -> str:
+        if not self.suggestions:
+            return ""
+        return "\n-# Did you mean: " + ", ".join(self.suggestions) + "?"
 
 
 class ErrorStatusCode(Exception):
@@ -45,3 +51,17 @@ class BadRequest(Exception):
 
     def formatted_exc(self) -> str:
         return stringify_errors(self.errors)
+
+
+class ApiUnavailable(Exception):
+    def __init__(self, host: str):
+        super().__init__()
+        self.host = host
+
+    def formatted_exc(self) -> str:
+        return "Couldn't reach the servers at the moment, try again in a bit!"
+
+
+class DeadlineExceeded(Exception):
+    def formatted_exc(self) -> str:
+        return "The Maplist took too long to answer, try again in a bit!"
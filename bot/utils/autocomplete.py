@@ -0,0 +1,65 @@
+import asyncio
+import discord
+from collections.abc import Awaitable, Callable
+from functools import wraps
+from typing import Any
+
+
+class AutocompleteTracker:
+    """
+    Keeps at most one lookup in flight per user & field. Every keystroke sends a new
+    autocomplete interaction, and Discord only shows the results of the last one,
+    so a newer lookup cancels the previous one.
+    """
+    def __init__(self):
+        self.inflight: dict[tuple[int, str], asyncio.Task] = {}
+        self.superseded: set[asyncio.Task] = set()
+        self.lookups: dict[str, int] = {}
+        self.cancelled: dict[str, int] = {}
+
+    async def run(self, user_id: int, field: str, lookup: Awaitable[list]) -> list:
+        """
+        :param user_id: Who's typing.
+        :param field: Name of the field being autocompleted.
+        :param lookup: The lookup to run.
+        :return: Its result, or no results if it was superseded.
+        """
+        key = (user_id, field)
+        self.lookups[field] = self.lookups.get(field, 0) + 1
+        if (previous := self.inflight.get(key)) and not previous.done():
+            self.superseded.add(previous)
+            previous.cancel()
+            self.cancelled[field] = self.cancelled.get(field, 0) + 1
+
+        task = asyncio.create_task(lookup)
+        self.inflight[key] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task in self.superseded:
+                return []
+            raise
+        finally:
+            self.superseded.discard(task)
+            if self.inflight.get(key) is task:
+                del self.inflight[key]
+
+    def stats(self) -> dict[str, tuple[int, int]]:
+        """Number of lookups and number of cancelled lookups, by field."""
+        return {
+            field: (self.lookups[field], self.cancelled.get(field, 0))
+            for field in self.lookups
+        }
+
+
+autocompletes = AutocompleteTracker()
+
+
+def supersedable(field: str):
+    """Makes an autocomplete callback cancel its user's previous lookup for the same field."""
+    def decorator(callback: Callable[[Any, discord.Interaction, str], Awaitable[list]]):
+        @wraps(callback)
+        async def wrapper(self, interaction: discord.Interaction, current: str):
+            return await autocompletes.run(interaction.user.id, field, callback(self, interaction, current))
+        return wrapper
+    return decorator
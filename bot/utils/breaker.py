@@ -0,0 +1,59 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a host after too many consecutive failures.
+    Once the cooldown is over it lets a single request through as a probe: if it
+    fails it opens right away, if it succeeds it closes. If the probe doesn't report
+    back within another cooldown (e.g. it was cancelled), a new one is let through.
+    """
+    def __init__(self, name: str, threshold: int, cooldown: float):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        # Set while a probe is in flight, until when another one can't be sent
+        self.probing_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    @property
+    def is_half_open(self) -> bool:
+        return self.failures >= self.threshold and not self.is_open
+
+    def allow(self) -> bool:
+        if self.is_open:
+            self.rejected += 1
+            return False
+        if self.is_half_open:
+            now = time.monotonic()
+            if now < self.probing_until:
+                self.rejected += 1
+                return False
+            self.probing_until = now + self.cooldown
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probing_until = 0.0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold and not self.is_open:
+            self.open_until = time.monotonic() + self.cooldown
+            self.probing_until = 0.0
+            self.times_opened += 1
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "open": self.is_open,
+            "failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+def approx_size(value: Any) -> int:
+    """Rough size of a decoded payload, in bytes. Uses its JSON encoding, if it has one."""
+    try:
+        return len(json.dumps(value, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class SingleFlight:
+    """Makes concurrent callers asking for the same key share a single in-flight call."""
+    def __init__(self):
+        self.inflight: dict[Hashable, asyncio.Task] = {}
+        self.waiters: dict[asyncio.Task, int] = {}
+        self.calls: dict[str, int] = {}
+        self.collapsed: dict[str, int] = {}
+        self.cancelled: dict[str, int] = {}
+
+    async def run(
+            self,
+            name: str,
+            key: Hashable,
+            request_cb: Callable[[], Awaitable[Any]],
+            cancellable: bool = False,
+    ) -> Any:
+        """
+        :param name: Name of the group the key belongs to, used for stats.
+        :param key: Canonical key of the call.
+        :param request_cb: Starts the call, only invoked if there isn't one in flight already.
+        :param cancellable: Cancel the call if every caller waiting for it is cancelled.
+                            Otherwise, it's left running for whoever asks for it next.
+        """
+        self.calls[name] = self.calls.get(name, 0) + 1
+        key = (name, key)
+        if key in self.inflight:
+            self.collapsed[name] = self.collapsed.get(name, 0) + 1
+        else:
+            task = asyncio.create_task(request_cb())
+            self.inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+
+        task = self.inflight[key]
+        self.waiters[task] = self.waiters.get(task, 0) + 1
+        try:
+            # Shielded, so a caller getting cancelled doesn't cancel the call for everyone else.
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if cancellable and self.waiters[task] == 1 and not task.done():
+                task.cancel()
+                self.cancelled[name] = self.cancelled.get(name, 0) + 1
+            raise
+        finally:
+            self.waiters[task] -= 1
+            if self.waiters[task] == 0:
+                del self.waiters[task]
+
+    def _on_done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if not task.cancelled():
+            # Retrieve it so it isn't logged as "never retrieved" if every caller was cancelled.
+            task.exception()
+
+    def stats(self) -> dict[str, tuple[int, int]]:
+        """Number of calls and number of collapsed calls, by group."""
+        return {
+            name: (self.calls[name], self.collapsed.get(name, 0))
+            for name in self.calls
+        }
+
+
+class StaleList(list):
+    """A list served past its expiration."""
+
+
+class StaleDict(dict):
+    """A dict served past its expiration."""
+
+
+def mark_stale(value: Any) -> Any:
+    """Shallow copy of a payload, marked as stale."""
+    if isinstance(value, list):
+        return StaleList(value)
+    if isinstance(value, dict):
+        return StaleDict(value)
+    return value
+
+
+def is_stale(value: Any) -> bool:
+    return isinstance(value, (StaleList, StaleDict))
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "expires_at", "keep_until")
+
+    def __init__(self, value: Any, size: int, expires_at: float, keep_until: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.keep_until = keep_until
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    @property
+    def stale_for(self) -> float:
+        """Seconds since the entry expired."""
+        return max(0.0, time.monotonic() - self.expires_at)
+
+
+class MemoryCache:
+    """
+    In-memory LRU cache for already decoded objects, with a TTL per entry.
+    It's bounded both by number of entries and by their total (approximate) size.
+    Cached values are shared between callers, so they must be treated as read-only.
+
+    Entries can be kept for a grace period after they expire, so callers can
+    still decide to use them. Check CacheEntry.fresh to know if they did.
+    """
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> CacheEntry | None:
+        entry = self.entries.get(key)
+        if entry is not None and entry.keep_until <= time.monotonic():
+            self.delete(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def peek(self, key: Hashable) -> CacheEntry | None:
+        """Like get, but doesn't count as a hit or miss, nor as a use of the entry."""
+        entry = self.entries.get(key)
+        if entry is not None and entry.keep_until <= time.monotonic():
+            return None
+        return entry
+
+    def set(
+            self,
+            key: Hashable,
+            value: Any,
+            ttl: float,
+            grace: float = 0,
+            size: int | None = None,
+    ) -> None:
+        """
+        :param key: The key of the entry.
+        :param value: The value to cache.
+        :param ttl: Seconds after which the entry is expired.
+        :param grace: Seconds an expired entry is kept for.
+        :param size: Size of the value, if known. Estimated otherwise.
+        """
+        if size is None:
+            size = approx_size(value)
+        self.delete(key)
+        if size > self.max_bytes:
+            return
+
+        now = time.monotonic()
+        self.entries[key] = CacheEntry(value, size, now + ttl, now + ttl + grace)
+        self.size += size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _k, evicted = self.entries.popitem(last=False)
+            self.size -= evicted.size
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        if (entry := self.entries.pop(key, None)) is not None:
+            self.size -= entry.size
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,49 @@
+import time
+from bot.utils.mapindex import map_index
+
+
+class Catalog:
+    """
+    Local copy of the map lists, kept in sync in the background, so list commands
+    don't have to download them. Every list the request helpers fetch ends up here,
+    and in the map index. Lists are shared, they must be treated as read-only.
+    """
+    def __init__(self):
+        # source -> (maps, when they were last confirmed up to date)
+        self.lists: dict[str, tuple[list[dict], float]] = {}
+
+    def update(self, source: str, maps: list[dict], synced_at: float | None = None) -> None:
+        """
+        :param source: Name of the list, e.g. "maplist" or "botb:0".
+        :param maps: The maps in the list, as returned by the API.
+        :param synced_at: When the list was fetched. Defaults to now.
+        """
+        if synced_at is None:
+            synced_at = time.time()
+        self.lists[source] = (maps, synced_at)
+        map_index.update_source(source, maps)
+
+    def get(self, source: str) -> list[dict] | None:
+        """:return: The maps in a list, or None if it was never synced."""
+        return self.lists[source][0] if source in self.lists else None
+
+    def synced_at(self, *sources: str) -> float | None:
+        """:return: When the least recently synced of the lists was synced, if they all were."""
+        if any(source not in self.lists for source in sources):
+            return None
+        return min(self.lists[source][1] for source in sources)
+
+    def dump(self) -> dict:
+        return {
+            source: {"maps": maps, "synced_at": synced_at}
+            for source, (maps, synced_at) in self.lists.items()
+        }
+
+    def load(self, data: dict) -> None:
+        """Loads the lists of a dump, unless they've been synced more recently in the meantime."""
+        for source, dumped in data.items():
+            if source not in self.lists:
+                self.update(source, dumped["maps"], synced_at=dumped["synced_at"])
+
+
+catalog = Catalog()
@@ -0,0 +1,69 @@
+import asyncio
+import time
+import discord
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections.abc import Coroutine
+from typing import Any
+from bot.exceptions import DeadlineExceeded
+
+# Discord invalidates interactions that aren't responded to within this many seconds
+INTERACTION_WINDOW = 3
+
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def within(seconds: float):
+    """
+    Requests made in this context (and in tasks started from it) must be done within some seconds.
+    If there's already a deadline, the earliest one wins.
+    """
+    new_deadline = time.monotonic() + seconds
+    if (current := _deadline.get()) is not None:
+        new_deadline = min(new_deadline, current)
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def for_interaction(interaction: discord.Interaction, margin: float = 0.5):
+    """Deadline for everything that has to be done before responding to an interaction."""
+    elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    return within(INTERACTION_WINDOW - margin - elapsed)
+
+
+def remaining() -> float | None:
+    """Seconds left before the deadline, or None if there's no deadline."""
+    if (current := _deadline.get()) is None:
+        return None
+    return current - time.monotonic()
+
+
+def expired() -> bool:
+    time_left = remaining()
+    return time_left is not None and time_left <= 0
+
+
+def clear() -> None:
+    """Removes the deadline from the current context. Useful in tasks shared by many callers."""
+    _deadline.set(None)
+
+
+async def wait(aw: Coroutine[Any, Any, Any]) -> Any:
+    """Awaits something, raising DeadlineExceeded if it's not done before the deadline."""
+    time_left = remaining()
+    if time_left is None:
+        return await aw
+    if time_left <= 0:
+        aw.close()
+        raise DeadlineExceeded()
+
+    try:
+        return await asyncio.wait_for(aw, time_left)
+    except asyncio.TimeoutError:
+        if expired():
+            raise DeadlineExceeded() from None
+        raise
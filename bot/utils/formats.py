@@ -0,0 +1,46 @@
+import re
+from typing import Literal
+
+SubmissionKind = Literal["run", "map"]
+webhook_url_re = re.compile(r"https://discord.com/api/webhooks/(\d+)")
+
+
+class FormatRegistry:
+    """
+    Snapshot of the Maplist's formats, indexed for the lookups commands need.
+    It's rebuilt every time formats are fetched, and never changed in place, so its
+    collections can be used as they are.
+    """
+    def __init__(self):
+        self.loaded = False
+        self.formats: list[dict] = []
+        self.by_id: dict[int, dict] = {}
+        # Webhook ID -> format & kind of submissions it posts
+        self.by_webhook: dict[int, tuple[dict, SubmissionKind]] = {}
+        self.visible: set[int] = set()
+        self.open_runs: set[int] = set()
+        self.open_maps: set[int] = set()
+
+    def update(self, formats: list[dict]) -> None:
+        by_webhook = {}
+        for format_data in formats:
+            for kind, field in (("run", "run_submission_wh"), ("map", "map_submission_wh")):
+                if format_data[field] and (match := webhook_url_re.match(format_data[field])):
+                    by_webhook[int(match.group(1))] = (format_data, kind)
+
+        # Swapped all at once, so nobody sees half of the new snapshot
+        self.formats, self.by_id, self.by_webhook, self.visible, self.open_runs, self.open_maps = (
+            formats,
+            {format_data["id"]: format_data for format_data in formats},
+            by_webhook,
+            {format_data["id"] for format_data in formats if not format_data["hidden"]},
+            {
+                format_data["id"] for format_data in formats
+                if format_data["run_submission_status"] != "closed" and not format_data["hidden"]
+            },
+            {format_data["id"] for format_data in formats if format_data["map_submission_status"] != "closed"},
+        )
+        self.loaded = True
+
+
+format_registry = FormatRegistry()
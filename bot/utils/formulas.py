@@ -1,4 +1,5 @@
 import math
+from typing import Any
 
 
 def points(idx: int, config: dict) -> float:
@@ -21,3 +22,61 @@ def get_page_idxs(
     req_page_start = start_idx // items_page_srv + 1
     req_page_end = end_idx // items_page_srv + 1
     return start_idx, end_idx, req_page_start, req_page_end
+
+
+def get_read_ahead_pages(
+        page: int,
+        total_pages: int,
+        items_page: int,
+        items_page_srv: int,
+        window: int,
+) -> list[int]:
+    """
+    Server pages to fetch in advance while the user is on a page. There's only something
+    to fetch if the next page needs server pages that the current one doesn't.
+    :param page: Page the user is on.
+    :param total_pages: Total number of pages (Discord).
+    :param items_page: Items per page (Discord).
+    :param items_page_srv: Items per page (API).
+    :param window: How many server pages to fetch.
+    """
+    if page >= total_pages:
+        return []
+    _si, _ei, _ps, current_end = get_page_idxs(page, items_page, items_page_srv)
+    _si, _ei, _ps, next_end = get_page_idxs(page+1, items_page, items_page_srv)
+    if next_end <= current_end:
+        return []
+    _si, _ei, _ps, last_page_srv = get_page_idxs(total_pages, items_page, items_page_srv)
+    return list(range(current_end+1, min(last_page_srv, current_end+window) + 1))
+
+
+def get_page_rows(
+        page: int,
+        saved_pages: dict[int, dict | list],
+        items_page: int,
+        items_page_srv: int,
+        list_key: str | None = "entries",
+) -> list[Any]:
+    """
+    Rows to show on a page (Discord), out of the pages fetched from the server.
+    :param page: Page the user is on.
+    :param saved_pages: Number of page and contents of the page (API).
+    :param items_page: Items per page (Discord).
+    :param items_page_srv: Items per page (API).
+    :param list_key: Key to access the list in the payload.
+    """
+    needed = []
+    start_idx, end_idx, req_page_start, req_page_end = get_page_idxs(page, items_page, items_page_srv)
+    for srv_page_idx in range(req_page_start, req_page_end + 1):
+        if srv_page_idx not in saved_pages:
+            continue
+        srv_page = saved_pages[srv_page_idx]
+
+        page_list = srv_page[list_key] if list_key else srv_page
+        entry_sidx = start_idx % items_page_srv
+        count = min(len(page_list), entry_sidx + end_idx - start_idx + 1)
+        for i in range(entry_sidx, count):
+            needed.append(page_list[i])
+        start_idx += count - entry_sidx
+
+    return needed
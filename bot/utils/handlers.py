@@ -6,7 +6,12 @@ import traceback
 async def handle_error(
         interaction: discord.Interaction,
         error: Exception,
+        keep_response: bool = False,
 ) -> None:
+    """
+    :param keep_response: If the interaction was already responded to, send the error
+                          as an ephemeral followup instead of replacing the response.
+    """
     thrown_error = error.__cause__
     error_type = type(error.__cause__)
     if error.__cause__ is None:
@@ -25,7 +30,9 @@ async def handle_error(
         traceback.print_exception(error, file=str_traceback)
         print(f"\n{str_traceback.getvalue().rstrip()}\n")
 
-    if interaction.response.is_done():
+    if interaction.response.is_done() and keep_response:
+        await interaction.followup.send(content, ephemeral=True)
+    elif interaction.response.is_done():
         await interaction.edit_original_response(content=content)
     else:
         await interaction.response.send_message(content, ephemeral=True)
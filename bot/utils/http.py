@@ -1,41 +1,620 @@
 import asyncio
+import json
+import math
 import os
+import random
+import sqlite3
+import time
+import aiohttp
+import aiohttp.hdrs
 import aiohttp_client_cache
-import cryptography.hazmat.primitives.asymmetric.rsa
-from config import DATA_PATH, PRIVKEY_PATH, PRIVKEY_PSWD
-from cryptography.hazmat.primitives import serialization
-from bot.utils.colors import purple
+from config import (
+    DATA_PATH,
+    PRIVKEY_PATH,
+    PRIVKEY_PSWD,
+    API_BASE_URL,
+    HTTP_MEMORY_CACHE_MAX_ENTRIES,
+    HTTP_MEMORY_CACHE_MAX_MB,
+    HTTP_PAGE_STORE_MAX_ENTRIES,
+    HTTP_PAGE_STORE_MAX_MB,
+    HTTP_CACHE_MAX_MB,
+    HTTP_CACHE_MAINTENANCE_EVERY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_SIZE,
+    HTTP_POOL_SIZE_NK,
+    HTTP_PREWARM_CONNECTIONS,
+    HTTP_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    HTTP_BREAKER_THRESHOLD,
+    HTTP_BREAKER_COOLDOWN,
+    HTTP_PREFETCH_MAX_INFLIGHT,
+    HTTP_PREFETCH_PER_MINUTE,
+    SIGNING_WORKERS,
+    SIGNING_PROCESSES,
+)
+from bot.utils.colors import purple, yellow
+from bot.utils.cache import SingleFlight, MemoryCache, mark_stale
+from bot.utils.breaker import CircuitBreaker
+from bot.utils.signing import SigningPool
+from bot.exceptions import ErrorStatusCode, ApiUnavailable, DeadlineExceeded
+from bot.utils import deadline
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Hashable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from fnmatch import fnmatch
+from functools import partial, wraps
+from typing import Any
 
 
-client: aiohttp_client_cache.CachedSession | None = None
-private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey | None = None
+cache_path = os.path.join(DATA_PATH, ".cache", "aiohttp-requests.db")
+client: "ResilientSession | None" = None
+nk_client: "ResilientSession | None" = None
+# Plain session to download attachments from Discord's CDN, they shouldn't end up in the cache.
+cdn_client: aiohttp.ClientSession | None = None
+# Set once the sessions are up
+ready = asyncio.Event()
+signer: SigningPool | None = None
+inflight = SingleFlight()
+# HTTP_MEMORY_CACHE_MAX_* is split between memory_cache and validators_cache
+VALIDATORS_CACHE_SHARE = 0.25
+memory_cache = MemoryCache(
+    int(HTTP_MEMORY_CACHE_MAX_ENTRIES * (1-VALIDATORS_CACHE_SHARE)),
+    int(HTTP_MEMORY_CACHE_MAX_MB * 1024**2 * (1-VALIDATORS_CACHE_SHARE)),
+)
+# Same as memory_cache, for pages of paginated resources. Kept apart so browsing
+# long lists doesn't evict everything else.
+page_store = MemoryCache(HTTP_PAGE_STORE_MAX_ENTRIES, HTTP_PAGE_STORE_MAX_MB * 1024**2)
+# URL -> (ETag, Last-Modified, decoded body) of the last copy of resources fetched with revalidating_get.
+# Payloads are usually the same objects held by memory_cache, but they're counted in both caches,
+# so together they never go over the configured budget.
+validators_cache = MemoryCache(
+    int(HTTP_MEMORY_CACHE_MAX_ENTRIES * VALIDATORS_CACHE_SHARE),
+    int(HTTP_MEMORY_CACHE_MAX_MB * 1024**2 * VALIDATORS_CACHE_SHARE),
+)
+revalidation_stats = {
+    "requests": 0,
+    "not_modified": 0,
+    "bytes_saved": 0,
+}
+
+# Resources which can be kept in memory, already decoded, in front of the SQLite cache.
+# Small & hot payloads, or ones that are expensive to decode. All times are in seconds.
+# - ttl: how long the resource is fresh for.
+# - stale: how long after expiring it's still returned right away, while it's refreshed in the background.
+# - stale_if_error: how long after expiring it's returned (marked as stale) if the API is erroring.
+# - pages: whether it's a page of a paginated resource, kept in page_store instead of memory_cache.
+# Lists & settings that rarely change, and are better outdated than missing.
+DEFAULT_CACHE_POLICY = {"ttl": 60 * 5, "stale": 3600 * 6, "stale_if_error": 3600 * 24}
+cache_policies = {
+    "config": DEFAULT_CACHE_POLICY,
+    "formats": DEFAULT_CACHE_POLICY,
+    "maplist": DEFAULT_CACHE_POLICY,
+    "experts": DEFAULT_CACHE_POLICY,
+    "botb": DEFAULT_CACHE_POLICY,
+    "nostalgia_pack": DEFAULT_CACHE_POLICY,
+    "retro_maps": DEFAULT_CACHE_POLICY,
+    "map": {"ttl": 60, "stale_if_error": 3600 * 6},
+    # Paginators don't keep the pages they show, every navigation asks for them again.
+    "leaderboard": {"ttl": 60, "stale": 60 * 10, "stale_if_error": 3600 * 6, "pages": True},
+    "map_completions": {"ttl": 60, "stale": 60 * 5, "stale_if_error": 3600, "pages": True},
+    "user_completions": {"ttl": 60, "stale": 60 * 5, "stale_if_error": 3600, "pages": True},
+    # Permissions shouldn't be outdated for long. Invalidated when the user changes (see requests.maplist.invalidate_user)
+    "submitter": {"ttl": 60 * 2},
+}
+_background_tasks: set[asyncio.Task] = set()
+
+# Resources fetched in advance (see prefetch) that nobody asked for yet, oldest first.
+prefetched: OrderedDict[tuple[str, Hashable], None] = OrderedDict()
+# Resource name -> started, hits (asked for after being prefetched), wasted (never asked for), skipped (over budget)
+prefetch_stats: dict[str, dict[str, int]] = {}
+_prefetch_inflight = 0
+_prefetch_started_at: deque[float] = deque()
+_is_prefetch: ContextVar[bool] = ContextVar("is_prefetch", default=False)
+
+# First match wins. Signed endpoints that aren't listed here fall back to the default expiration.
+urls_expire_after = {
+    f"{API_BASE_URL}/formats/bot": 60 * 5,
+    f"{API_BASE_URL}/users/*/bot": 60,
+    # A queue of pending updates, it changes whenever they're confirmed. Never cache it.
+    f"{API_BASE_URL}/roles/achievement/updates/bot": 0,
+    "data.ninjakiwi.com": 3600 * 24 * 7,
+}
+
+# (connect, read) timeouts in seconds. First match wins, the rest uses HTTP_CONNECT_TIMEOUT & HTTP_READ_TIMEOUT.
+urls_timeout = {
+    # Autocomplete has to answer fast, there's no point waiting
+    f"{API_BASE_URL}/search": (1, 2),
+    # Uploads proof images
+    f"{API_BASE_URL}/maps/submit/bot": (HTTP_CONNECT_TIMEOUT, 60),
+    f"{API_BASE_URL}/maps/*/completions/submit/bot": (HTTP_CONNECT_TIMEOUT, 60),
+}
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {aiohttp.hdrs.METH_GET, aiohttp.hdrs.METH_HEAD}
+
+
+def url_match(url: str, pattern: str) -> bool:
+    """Same matching as aiohttp_client_cache's urls_expire_after."""
+    url = url.split("://")[-1]
+    pattern = pattern.split("://")[-1].rstrip("*") + "*"
+    return fnmatch(url, pattern)
+
+
+def timeout_for(url: str) -> aiohttp.ClientTimeout:
+    connect, read = next(
+        (timeouts for pattern, timeouts in urls_timeout.items() if url_match(url, pattern)),
+        (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+    )
+    return aiohttp.ClientTimeout(connect=connect, sock_read=read)
+
+
+class ResilientSession:
+    """
+    Wraps a cached session with per-endpoint timeouts, retries with jittered exponential
+    backoff for idempotent requests, and a circuit breaker for the host it talks to.
+    The breaker only hears about requests that go over the network: responses served from
+    the cache never ask it, so they keep working while the circuit is open, and never use up
+    the probe of a half-open circuit. Each request, retries included, counts once.
+    Requests never run past the deadline of the context they're made in (see bot.utils.deadline).
+    """
+    def __init__(self, session: aiohttp_client_cache.CachedSession, breaker: CircuitBreaker):
+        self.session = session
+        self.cache = session.cache
+        self.breaker = breaker
+        self.retries = 0
+
+    async def __aenter__(self) -> "ResilientSession":
+        await self.session.__aenter__()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.session.__aexit__(*args)
+
+    def get(self, url: str, **kwargs):
+        return self.request(aiohttp.hdrs.METH_GET, url, **kwargs)
+
+    def options(self, url: str, **kwargs):
+        return self.request(aiohttp.hdrs.METH_OPTIONS, url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request(aiohttp.hdrs.METH_POST, url, **kwargs)
+
+    def put(self, url: str, **kwargs):
+        return self.request(aiohttp.hdrs.METH_PUT, url, **kwargs)
+
+    def delete(self, url: str, **kwargs):
+        return self.request(aiohttp.hdrs.METH_DELETE, url, **kwargs)
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, use_breaker: bool = True, **kwargs):
+        """
+        Same as ClientSession.request, only usable with async with.
+        :param use_breaker: Requests that say nothing about the API's health (e.g. warming up
+                            connections) can bypass the breaker.
+        """
+        kwargs["timeout"] = kwargs.get("timeout") or timeout_for(url)
+        if use_breaker:
+            resp = await self.send(method, url, **kwargs)
+        else:
+            resp = await self.session.request(method, url, **kwargs)
+        try:
+            yield resp
+        finally:
+            resp.release()
+
+    async def send(self, method: str, url: str, **kwargs):
+        # Same lookup the cached session does before sending the request
+        if method.upper() in self.cache.allowed_methods:
+            key = self.cache.create_key(method, url, **kwargs)
+            actions = self.cache.create_cache_actions(key, url, **kwargs)
+            if not actions.revalidate and (cached := await self.cache.request(actions)):
+                return cached
+
+        if not self.breaker.allow():
+            raise ApiUnavailable(self.breaker.name)
+        timeout = kwargs["timeout"]
+        attempts = 1 + (HTTP_RETRIES if method.upper() in IDEMPOTENT_METHODS else 0)
+        for attempt in range(attempts):
+            if deadline.expired():
+                raise DeadlineExceeded()
+            if (time_left := deadline.remaining()) is not None:
+                kwargs["timeout"] = aiohttp.ClientTimeout(
+                    total=time_left,
+                    connect=timeout.connect,
+                    sock_read=timeout.sock_read,
+                )
+
+            last_attempt = attempt == attempts-1
+            try:
+                resp = await self.session.request(method, url, **kwargs)
+            except asyncio.TimeoutError:
+                if deadline.expired():
+                    raise DeadlineExceeded() from None
+                if last_attempt:
+                    self.breaker.record_failure()
+                    raise
+            except aiohttp.ClientConnectionError:
+                if last_attempt:
+                    self.breaker.record_failure()
+                    raise
+            else:
+                if resp.status < 500:
+                    self.breaker.record_success()
+                    return resp
+                if last_attempt or resp.status not in RETRY_STATUSES:
+                    self.breaker.record_failure()
+                    return resp
+                resp.release()
+
+            self.retries += 1
+            # "Full jitter" backoff
+            await asyncio.sleep(random.uniform(0, HTTP_RETRY_BACKOFF * 2**attempt))
+
+    async def delete_expired_responses(self) -> None:
+        await self.session.delete_expired_responses()
+
+
+def make_session(
+        cache: aiohttp_client_cache.CacheBackend,
+        breaker: CircuitBreaker,
+        pool_size: int,
+) -> ResilientSession:
+    return ResilientSession(
+        aiohttp_client_cache.CachedSession(
+            cache=cache,
+            connector=aiohttp.TCPConnector(
+                limit=pool_size,
+                limit_per_host=pool_size,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            ),
+            timeout=aiohttp.ClientTimeout(connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT),
+        ),
+        breaker,
+    )
+
+
+async def prewarm(session: ResilientSession, url: str, connections: int) -> None:
+    """Opens some keep-alive connections in advance, so the first requests don't have to."""
+    async def open_connection():
+        # OPTIONS is never cached, so it always reaches the server. The API might not
+        # even implement it, so it shouldn't count towards opening the circuit.
+        async with session.options(url, use_breaker=False):
+            pass
+
+    results = await asyncio.gather(*[open_connection() for _ in range(connections)], return_exceptions=True)
+    opened = len([res for res in results if not isinstance(res, Exception)])
+    print(f"{purple('[HTTP]')} Opened {opened}/{connections} connections to {url}")
+
+
+def resource(name: str, key: Callable[..., Hashable] | None = None, cancellable: bool = False):
+    """
+    Marks a request helper as fetching an API resource. Concurrent calls
+    asking for the same resource share the same request (and its result or exception),
+    so callers must treat what they get as read-only.
+    If the resource has a policy in cache_policies, its results are also kept in memory (see cache_for)
+    and may be served stale (see cache_policies). Values served because the API is erroring
+    or because it'd take past the deadline (see bot.utils.deadline) are marked, check them
+    with bot.utils.cache.is_stale. helper.refresh(...) fetches it even if it's still fresh.
+    :param name: Name of the resource.
+    :param key: Builds the canonical key of the resource from the helper's arguments.
+                Defaults to the arguments themselves.
+    :param cancellable: Cancel the request if every caller waiting for it is cancelled, instead of
+                        letting it finish for the next caller. For resources nobody asks twice for.
+    """
+    def make_key(*args, **kwargs) -> Hashable:
+        return key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+
+    def decorator(request_func: Callable):
+        async def fetch(res_key: Hashable, *args, **kwargs):
+            # Shared between callers, it shouldn't be cut short by the deadline of whoever started it.
+            deadline.clear()
+            value = await request_func(*args, **kwargs)
+            if policy := cache_policies.get(name):
+                grace = max(policy.get("stale", 0), policy.get("stale_if_error", 0))
+                cache_for(name).set((name, res_key), value, policy["ttl"], grace=grace)
+            return value
+
+        @wraps(request_func)
+        async def wrapper(*args, **kwargs):
+            res_key = make_key(*args, **kwargs)
+            policy = cache_policies.get(name)
+            if (name, res_key) in prefetched and not _is_prefetch.get():
+                count_prefetch_hit(name, res_key)
+            fetch_resource = partial(fetch, res_key, *args, **kwargs)
+
+            entry = None
+            if policy and (entry := cache_for(name).get((name, res_key))):
+                if entry.fresh:
+                    return entry.value
+                if entry.stale_for <= policy.get("stale", 0):
+                    revalidate(name, res_key, fetch_resource)
+                    return entry.value
+
+            try:
+                return await deadline.wait(inflight.run(name, res_key, fetch_resource, cancellable=cancellable))
+            except DeadlineExceeded:
+                # The request keeps going in the background, and will be cached for the next caller.
+                if entry is None:
+                    raise
+                return mark_stale(entry.value)
+            except Exception as exc:
+                if entry is None or not is_api_error(exc) or \
+                        entry.stale_for > policy.get("stale_if_error", 0):
+                    raise
+                print(f"{yellow('[HTTP]')} Serving stale {name} {res_key}: {type(exc).__name__}")
+                return mark_stale(entry.value)
+
+        async def refresh(*args, **kwargs):
+            """Fetches the resource even if it's still fresh, and waits for it."""
+            res_key = make_key(*args, **kwargs)
+            return await inflight.run(name, res_key, partial(fetch, res_key, *args, **kwargs))
+
+        wrapper.resource_key = lambda *args, **kwargs: (name, make_key(*args, **kwargs))
+        wrapper.refresh = refresh
+        return wrapper
+    return decorator
+
+
+def prefetch(helper: Callable[..., Awaitable], *args, **kwargs) -> bool:
+    """
+    Fetches a resource in the background because it's likely to be asked for soon, so it's
+    already in memory by then. Prefetches are best effort: they're skipped if the resource
+    is already fresh or being fetched, if the API is failing, or if they'd go over the budget
+    (HTTP_PREFETCH_MAX_INFLIGHT at a time and HTTP_PREFETCH_PER_MINUTE).
+    :param helper: A request helper marked with resource, whose resource has a policy in cache_policies.
+    :return: Whether the prefetch was started.
+    """
+    global _prefetch_inflight
+    name, res_key = helper.resource_key(*args, **kwargs)
+    stats = prefetch_stats.setdefault(name, {"started": 0, "hits": 0, "wasted": 0, "skipped": 0})
+    if (name, res_key) in inflight.inflight:
+        return False
+    if (entry := cache_for(name).peek((name, res_key))) and entry.fresh:
+        return False
+    if (name, res_key) in prefetched:
+        # Expired before anyone asked for it
+        del prefetched[(name, res_key)]
+        stats["wasted"] += 1
+    if client is None or client.breaker.is_open or client.breaker.is_half_open:
+        return False
+
+    now = time.monotonic()
+    while _prefetch_started_at and _prefetch_started_at[0] <= now - 60:
+        _prefetch_started_at.popleft()
+    if _prefetch_inflight >= HTTP_PREFETCH_MAX_INFLIGHT or len(_prefetch_started_at) >= HTTP_PREFETCH_PER_MINUTE:
+        stats["skipped"] += 1
+        return False
+
+    _prefetch_started_at.append(now)
+    _prefetch_inflight += 1
+    stats["started"] += 1
+    prefetched[(name, res_key)] = None
+    while len(prefetched) > HTTP_MEMORY_CACHE_MAX_ENTRIES:
+        (wasted_name, _k), _v = prefetched.popitem(last=False)
+        prefetch_stats[wasted_name]["wasted"] += 1
+
+    async def fetch():
+        global _prefetch_inflight
+        _is_prefetch.set(True)
+        deadline.clear()
+        try:
+            await helper(*args, **kwargs)
+        except Exception:
+            # Nobody is waiting for it. Whoever asks for it next will get the error, if it's still there.
+            prefetched.pop((name, res_key), None)
+        finally:
+            _prefetch_inflight -= 1
+
+    task = asyncio.create_task(fetch())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return True
+
+
+def count_prefetch_hit(name: str, res_key: Hashable) -> None:
+    """A prefetched resource was asked for. It's only a hit if it's still fresh or being fetched."""
+    del prefetched[(name, res_key)]
+    entry = cache_for(name).peek((name, res_key))
+    if (entry and entry.fresh) or (name, res_key) in inflight.inflight:
+        prefetch_stats[name]["hits"] += 1
+    else:
+        prefetch_stats[name]["wasted"] += 1
+
+
+def cache_for(name: str) -> MemoryCache:
+    """The in-memory cache a resource is kept in."""
+    return page_store if cache_policies.get(name, {}).get("pages") else memory_cache
+
+
+def revalidate(name: str, res_key: Hashable, fetch: Callable) -> None:
+    """Refreshes a resource in the background."""
+    async def refresh():
+        try:
+            await inflight.run(name, res_key, fetch)
+        except Exception as exc:
+            print(f"{yellow('[HTTP]')} Couldn't refresh {name} {res_key}: {type(exc).__name__}")
+
+    task = asyncio.create_task(refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def is_api_error(exc: Exception) -> bool:
+    """Whether the exception means the API is unreachable or erroring, rather than rejecting the request."""
+    if isinstance(exc, ErrorStatusCode):
+        return exc.status_code >= 500 or exc.status_code == 429
+    return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError, ApiUnavailable))
+
+
+async def revalidating_get(url: str) -> tuple[int, Any]:
+    """
+    GETs a JSON resource, sending the validators (ETag/Last-Modified) of the last copy
+    that was downloaded. If the API answers 304 Not Modified, the last copy is returned
+    without being downloaded or decoded again.
+    :return: The status code and the decoded body, which is None if the request wasn't successful.
+    """
+    headers = {}
+    if cached := validators_cache.get(url):
+        etag, last_modified, _payload = cached.value
+        if etag:
+            headers[aiohttp.hdrs.IF_NONE_MATCH] = etag
+        if last_modified:
+            headers[aiohttp.hdrs.IF_MODIFIED_SINCE] = last_modified
+
+    revalidation_stats["requests"] += 1
+    async with client.get(url, headers=headers) as resp:
+        if resp.status == 304 and cached:
+            revalidation_stats["not_modified"] += 1
+            revalidation_stats["bytes_saved"] += cached.size
+            return 200, cached.value[2]
+        if not resp.ok:
+            return resp.status, None
+
+        body = await resp.read()
+        payload = json.loads(body)
+        etag = resp.headers.get(aiohttp.hdrs.ETAG)
+        last_modified = resp.headers.get(aiohttp.hdrs.LAST_MODIFIED)
+        if etag or last_modified:
+            validators_cache.set(url, (etag, last_modified, payload), math.inf, size=len(body))
+        return resp.status, payload
+
+
+def is_conditional(response: aiohttp.ClientResponse) -> bool:
+    """Whether the response is for a conditional request. Those shouldn't be stored in the SQLite cache."""
+    headers = response.request_info.headers
+    return aiohttp.hdrs.IF_NONE_MATCH in headers or aiohttp.hdrs.IF_MODIFIED_SINCE in headers
+
+
+def stats() -> dict[str, dict | None]:
+    return {
+        "coalesced": inflight.stats(),
+        "cancelled": inflight.cancelled,
+        "memory_cache": memory_cache.stats(),
+        "page_store": page_store.stats(),
+        "revalidation": revalidation_stats,
+        "prefetch": prefetch_stats,
+        "sessions": {
+            session.breaker.name: {**session.breaker.stats(), "retries": session.retries}
+            for session in (client, nk_client)
+            if session is not None
+        },
+        "signing": signer.stats() if signer else None,
+    }
+
+
+def compact_cache(path: str, max_bytes: int) -> tuple[int, int]:
+    """
+    Evicts the least recently stored responses until the SQLite cache fits in max_bytes,
+    gives the freed pages back to the filesystem and checkpoints the WAL.
+    Responses are stored again every time they're requested after expiring, so the ones
+    that have been stored least recently are the ones that have been used least recently.
+    It's blocking, run it in a thread.
+    :return: The number of evicted responses and the size of the database file afterwards.
+    """
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Only takes effect on an existing database after a full VACUUM
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.OperationalError as exc:
+            # Both need the database to themselves, but the cache backend keeps its own connection
+            # open. If it's using it right now, they're tried again next time.
+            if "locked" not in str(exc):
+                raise
+            print(f"{yellow('[HTTP]')} Couldn't convert the cache, the database is locked")
+
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        excess = (page_count - free_pages) * page_size - max_bytes
+
+        evicted = []
+        if excess > 0:
+            # Leave some headroom, so it doesn't have to evict again right away
+            to_free = excess + max_bytes // 10
+            rows = conn.execute("SELECT rowid, length(value) FROM responses ORDER BY rowid").fetchall()
+            for rowid, size in rows:
+                if to_free <= 0:
+                    break
+                evicted.append((rowid,))
+                to_free -= size
+
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            conn.execute("BEGIN")
+            conn.executemany("DELETE FROM responses WHERE rowid = ?", evicted)
+            if "redirects" in tables:
+                conn.execute("DELETE FROM redirects WHERE value NOT IN (SELECT key FROM responses)")
+            conn.execute("COMMIT")
+
+        # Frees one page per step, executescript steps through all of them
+        conn.executescript("PRAGMA incremental_vacuum;")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return len(evicted), os.path.getsize(path)
+    finally:
+        conn.close()
+
+
+async def maintain_cache(session: ResilientSession) -> None:
+    await session.delete_expired_responses()
+    if not os.path.exists(cache_path):
+        return
+    try:
+        evicted, size = await asyncio.to_thread(compact_cache, cache_path, HTTP_CACHE_MAX_MB * 1024**2)
+        if evicted:
+            print(f"{purple('[HTTP]')} Evicted {evicted} cached responses, cache is now {size / 1024**2:.1f}MB")
+    except sqlite3.Error as exc:
+        print(f"{yellow('[HTTP]')} Couldn't compact the cache: {exc}")
 
 
 async def init_http_client():
     cache = aiohttp_client_cache.SQLiteBackend(
-        cache_name=os.path.join(DATA_PATH, ".cache", "aiohttp-requests.db"),
+        cache_name=cache_path,
         expire_after=60*5,
-        urls_expire_after={
-            "data.ninjakiwi.com": 3600 * 24 * 7,
-        },
+        urls_expire_after=urls_expire_after,
         include_headers=True,
+        # Signatures are randomized, every signed URL would be a different key otherwise.
+        ignored_params=["signature"],
+        # delete_expired_responses also calls it with None for entries it couldn't read
+        filter_fn=lambda resp: resp is None or not is_conditional(resp),
     )
 
     async def init_session():
-        global client, private_key
+        global client, nk_client, cdn_client, signer
 
         with open(PRIVKEY_PATH, "rb") as fin:
-            private_key = serialization.load_pem_private_key(
+            signer = SigningPool(
                 fin.read(),
                 password=PRIVKEY_PSWD,
+                workers=SIGNING_WORKERS,
+                processes=SIGNING_PROCESSES,
             )
-            print(f"{purple('[HTTP]')} Loaded private key")
-
-        async with aiohttp_client_cache.CachedSession(cache=cache) as session:
-            client = session
-            print(f"{purple('[HTTP]')} Started session")
-            while True:
-                await session.delete_expired_responses()
-                await asyncio.sleep(3600 * 24 * 5)
+            print(f"{purple('[HTTP]')} Loaded {signer.signer.algorithm} private key")
+
+        api_breaker = CircuitBreaker("Maplist API", HTTP_BREAKER_THRESHOLD, HTTP_BREAKER_COOLDOWN)
+        nk_breaker = CircuitBreaker("Ninja Kiwi", HTTP_BREAKER_THRESHOLD, HTTP_BREAKER_COOLDOWN)
+        cdn_timeout = aiohttp.ClientTimeout(connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+        try:
+            async with make_session(cache, api_breaker, HTTP_POOL_SIZE) as session, \
+                    make_session(cache, nk_breaker, HTTP_POOL_SIZE_NK) as nk_session, \
+                    aiohttp.ClientSession(timeout=cdn_timeout) as cdn_session:
+                client = session
+                nk_client = nk_session
+                cdn_client = cdn_session
+                ready.set()
+                print(f"{purple('[HTTP]')} Started sessions")
+                await prewarm(session, API_BASE_URL, HTTP_PREWARM_CONNECTIONS)
+                while True:
+                    try:
+                        await maintain_cache(session)
+                    except Exception as exc:
+                        print(f"{yellow('[HTTP]')} Couldn't maintain the cache: {type(exc).__name__} {exc}")
+                    await asyncio.sleep(HTTP_CACHE_MAINTENANCE_EVERY)
+        finally:
+            signer.shutdown()
 
     asyncio.create_task(init_session())
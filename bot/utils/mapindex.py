@@ -0,0 +1,102 @@
+from bot.utils.search import SearchIndex
+
+
+class MapIndex:
+    """
+    Local index of the maps in the lists the bot fetches, to look them up by
+    code, name, alias or list position without asking the API.
+    Each list is a source: updating it adds, changes and removes only its own maps.
+    """
+    # Maps in the Maplist come first in results, in list order.
+    RANKS = {
+        "maplist": 0,
+        "experts": 1000,
+        "botb": 2000,
+        "nostalgia_pack": 3000,
+    }
+
+    def __init__(self):
+        self.index = SearchIndex()
+        # source -> the payload it was last updated with & the codes it contains
+        self.sources: dict[str, tuple[list[dict], set[str]]] = {}
+        self.maps: dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def update_source(self, source: str, maps: list[dict]) -> None:
+        """
+        :param source: Name of the list, e.g. "maplist" or "botb:0".
+        :param maps: The maps in the list, as returned by the API.
+        """
+        if source in self.sources and self.sources[source][0] is maps:
+            return
+
+        _old, old_codes = self.sources.get(source, ([], set()))
+        codes = {map_data["code"] for map_data in maps if map_data["code"]}
+        self.sources[source] = (maps, codes)
+
+        for map_data in maps:
+            if not map_data["code"]:
+                continue
+            entry = self.maps.setdefault(map_data["code"], {
+                "code": map_data["code"],
+                "name": map_data["name"],
+                "aliases": [],
+                "positions": {},
+            })
+            entry["name"] = map_data["name"]
+            entry["aliases"] = map_data.get("aliases", entry["aliases"])
+            entry["positions"][source] = map_data["format_idx"]
+            self._reindex(entry)
+
+        for code in old_codes - codes:
+            entry = self.maps[code]
+            entry["positions"].pop(source, None)
+            if len(entry["positions"]) == 0:
+                del self.maps[code]
+                self.index.remove(code)
+            else:
+                self._reindex(entry)
+
+    def update_map(self, map_data: dict) -> None:
+        """Adds what the full info of a map has that lists don't, e.g. its aliases."""
+        if (entry := self.maps.get(map_data["code"])) is None:
+            return
+        entry["name"] = map_data["name"]
+        entry["aliases"] = map_data["aliases"]
+        self._reindex(entry)
+
+    def _reindex(self, entry: dict) -> None:
+        terms = [entry["code"], entry["name"], *entry["aliases"]]
+        rank = min(
+            self.RANKS.get(source.split(":")[0], 0) + (position if isinstance(position, int) else 0)
+            for source, position in entry["positions"].items()
+        )
+        if isinstance(position := entry["positions"].get("maplist"), int):
+            terms.append(str(position))
+        self.index.upsert(
+            entry["code"],
+            {"code": entry["code"], "name": entry["name"]},
+            terms,
+            rank=rank,
+        )
+
+    def resolve(self, map_id: str) -> str:
+        """
+        Canonical code of a map, from anything the API accepts to identify it: its code,
+        Maplist position, name or an alias. If it's not in the index, returns it uppercase.
+        """
+        code = map_id.strip().upper()
+        if code in self.maps:
+            return code
+        if matches := self.index.lookup(map_id):
+            return matches[0]["code"]
+        return code
+
+    def search(self, query: str, limit: int = 25) -> list[dict]:
+        """:return: Maps matching the query, as {"code": ..., "name": ...}"""
+        return self.index.search(query, limit=limit)
+
+
+map_index = MapIndex()
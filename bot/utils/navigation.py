@@ -0,0 +1,61 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from config import VIEWS_NAVIGATION_WINDOW
+
+
+class NavigationCoalescer:
+    """
+    Folds rapid navigation on the same message (e.g. mashing ▶️) into a single render.
+    A navigation waits a short window before rendering its page. If another one comes
+    in the meantime, or while it's still rendering, it's cancelled along with the requests
+    it was waiting for, and only the newest one edits the message.
+    """
+    def __init__(self, window: float):
+        self.window = window
+        # Message key -> page it's going to & the task rendering it
+        self.pending: dict[int, tuple[int, asyncio.Task]] = {}
+        self.superseded_tasks: set[asyncio.Task] = set()
+        self.navigations = 0
+        self.superseded = 0
+
+    def target(self, key: int, default: int) -> int:
+        """:return: The page a message is going to, or default if it's not being navigated."""
+        return self.pending[key][0] if key in self.pending else default
+
+    async def navigate(self, key: int, page: int, render: Callable[[int], Awaitable[None]]) -> None:
+        """
+        :param key: Identifies the message being navigated.
+        :param page: The page to go to.
+        :param render: Renders a page on the message.
+        """
+        self.navigations += 1
+        if previous := self.pending.get(key):
+            self.superseded_tasks.add(previous[1])
+            previous[1].cancel()
+            self.superseded += 1
+
+        async def render_later():
+            await asyncio.sleep(self.window)
+            await render(page)
+
+        task = asyncio.create_task(render_later())
+        self.pending[key] = (page, task)
+        try:
+            await task
+        except asyncio.CancelledError:
+            if task in self.superseded_tasks:
+                return
+            raise
+        finally:
+            self.superseded_tasks.discard(task)
+            if key in self.pending and self.pending[key][1] is task:
+                del self.pending[key]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "navigations": self.navigations,
+            "superseded": self.superseded,
+        }
+
+
+navigation = NavigationCoalescer(VIEWS_NAVIGATION_WINDOW)
@@ -0,0 +1,71 @@
+import discord
+import math
+from config import HTTP_PREFETCH_PAGES
+from bot.utils.formulas import get_page_idxs, get_page_rows, get_read_ahead_pages
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+# Requests some pages (API) of a list, given the list's parameters
+RequestSourcePagesCb = Callable[[list[str], list[int]], Awaitable[dict[int, dict]]]
+# Builds the message of a page (Discord) out of its rows, given the list's parameters
+SourceMessageBuilderCb = Callable[[list[str], list[Any]], str | discord.Embed]
+# Fetches a page (API) of a list in the background, given the list's parameters
+PrefetchSourcePageCb = Callable[[list[str], int], Any]
+
+
+class PaginatedSource:
+    """
+    A server-paginated list that can be browsed with VPersistentList. Its parameters
+    (e.g. a leaderboard's format) are strings that end up in the buttons' custom IDs,
+    so they must be short and can't contain ':' or ','.
+    """
+    def __init__(
+            self,
+            name: str,
+            request_cb: RequestSourcePagesCb,
+            message_build_cb: SourceMessageBuilderCb,
+            items_page: int,
+            items_page_srv: int,
+            list_key: str | None = "entries",
+            prefetch_cb: PrefetchSourcePageCb | None = None,
+    ):
+        """
+        :param name: Short name of the source, used in custom IDs.
+        :param request_cb: Requests some pages of the list. They should come from the cache if possible,
+                           since every button press requests them.
+        :param message_build_cb: Builds the message of a page.
+        :param items_page: Items per page (Discord)
+        :param items_page_srv: Items per page (API)
+        :param list_key: Key to access the list in the payload.
+        :param prefetch_cb: Fetches a page in the background (e.g. with http.prefetch), to read ahead.
+        """
+        self.name = name
+        self.request_cb = request_cb
+        self.message_build_cb = message_build_cb
+        self.items_page = items_page
+        self.items_page_srv = items_page_srv
+        self.list_key = list_key
+        self.prefetch_cb = prefetch_cb
+
+    async def load_page(self, params: list[str], page: int) -> tuple[str | discord.Embed, int]:
+        """:return: The message of a page (Discord), and the total number of pages."""
+        _si, _ei, req_page_start, req_page_end = get_page_idxs(page, self.items_page, self.items_page_srv)
+        srv_pages = await self.request_cb(params, list(range(req_page_start, req_page_end + 1)))
+        total_pages = max(1, math.ceil(srv_pages[req_page_start]["total"] / self.items_page))
+        rows = get_page_rows(page, srv_pages, self.items_page, self.items_page_srv, self.list_key)
+        return self.message_build_cb(params, rows), total_pages
+
+    def read_ahead(self, params: list[str], page: int, total_pages: int) -> None:
+        """Fetches the server pages the next page needs in the background, if they're not needed yet."""
+        if self.prefetch_cb is None:
+            return
+        for srv_page in get_read_ahead_pages(page, total_pages, self.items_page, self.items_page_srv, HTTP_PREFETCH_PAGES):
+            self.prefetch_cb(params, srv_page)
+
+
+# Name -> source. Cogs register theirs when they're loaded.
+paginated_sources: dict[str, PaginatedSource] = {}
+
+
+def register_source(source: PaginatedSource) -> None:
+    paginated_sources[source.name] = source
@@ -1,36 +1,31 @@
-import io
+import asyncio
 import os
 
+import aiohttp
 import aiohttp.hdrs
 import discord
 import bot.utils.http
 from config import API_BASE_URL, API_BASE_PUBLIC_URL, DATA_PATH
 from bot.exceptions import MaplistResNotFound, ErrorStatusCode, BadRequest
-from bot.types import Format
+from bot.types import Format, NostalgiaPackGame
+from bot.utils.mapindex import map_index
+from bot.utils.catalog import catalog
+from bot.utils.colors import yellow
+from bot.utils.formats import FormatRegistry, format_registry
+from bot.utils.streaming import AttachmentStreams, DeferredPayload
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding, utils
 import json
 from aiohttp import FormData
-import base64
 import urllib.parse
+from typing import get_args
+from collections.abc import Awaitable
 
 http = bot.utils.http
 os.makedirs(os.path.join(DATA_PATH, "tmp"), exist_ok=True)
 
 
-# Signature methods & vulnerabilities: https://en.wikipedia.org/wiki/Digital_signature#Method
-# Good article on RSA signatures: https://cryptobook.nakov.com/digital-signatures/rsa-signatures
-def sign(message: bytes) -> str:
-    # https://cryptography.io/en/latest/hazmat/primitives/asymmetric/rsa/#signing
-    signature = http.private_key.sign(
-        message,
-        padding=padding.PSS(
-            padding.MGF1(hashes.SHA256()),
-            salt_length=padding.PSS.MAX_LENGTH,
-        ),
-        algorithm=hashes.SHA256(),
-    )
-    return base64.b64encode(signature).decode()
+async def sign(message: bytes) -> str:
+    return await http.signer.sign(message)
 
 
 def partial_sign(message: bytes, current: hashes.Hash | None = None) -> hashes.Hash:
@@ -40,75 +35,126 @@ def partial_sign(message: bytes, current: hashes.Hash | None = None) -> hashes.H
     return current
 
 
-def finish_sign(current: hashes.Hash) -> str:
-    sha256 = hashes.SHA256()
-
-    digest = current.finalize()
-    signature = http.private_key.sign(
-        digest,
-        padding.PSS(
-            padding.MGF1(sha256),
-            salt_length=padding.PSS.MAX_LENGTH,
-        ),
-        utils.Prehashed(sha256),
-    )
-    return base64.b64encode(signature).decode()
+async def finish_sign(current: hashes.Hash) -> str:
+    return await http.signer.sign_digest(current.finalize())
 
 
+# Positions, names and aliases of the same map all share its entry.
+# Maps that aren't in the index still go to the API: it only has the maps of the lists
+# the bot fetched, and deleted or unlisted maps can still be looked up by code.
+@http.resource("map", key=lambda map_id: map_index.resolve(map_id))
 async def get_maplist_map(map_id: str) -> dict:
-    async with http.client.get(f"{API_BASE_URL}/maps/{map_id.upper()}") as resp:
+    async with http.client.get(f"{API_BASE_URL}/maps/{map_index.resolve(map_id)}") as resp:
         if resp.status == 404:
-            raise MaplistResNotFound("map")
+            raise MaplistResNotFound(
+                "map",
+                suggestions=[f"{map_data['name']} (`{map_data['code']}`)" for map_data in map_index.search(map_id, 3)],
+            )
         elif not resp.ok:
             raise ErrorStatusCode(resp.status)
-        return await resp.json()
+        map_data = await resp.json()
+        map_index.update_map(map_data)
+        return map_data
 
 
+@http.resource("experts")
 async def get_experts() -> list:
-    async with http.client.get(f"{API_BASE_URL}/maps?format=51") as resp:
-        return await resp.json()
+    status, maps = await http.revalidating_get(f"{API_BASE_URL}/maps?format=51")
+    if status >= 400:
+        raise ErrorStatusCode(status)
+    catalog.update("experts", maps)
+    return maps
 
 
+@http.resource("maplist")
 async def get_maplist() -> list:
-    async with http.client.get(f"{API_BASE_URL}/maps?format=1") as resp:
-        return await resp.json()
+    status, maps = await http.revalidating_get(f"{API_BASE_URL}/maps?format=1")
+    if status >= 400:
+        raise ErrorStatusCode(status)
+    catalog.update("maplist", maps)
+    return maps
 
 
+@http.resource("nostalgia_pack")
 async def get_nostalgia_pack(game: int) -> list:
-    async with http.client.get(f"{API_BASE_URL}/maps?format=11&filter={game}") as resp:
-        return await resp.json()
+    status, maps = await http.revalidating_get(f"{API_BASE_URL}/maps?format=11&filter={game}")
+    if status >= 400:
+        raise ErrorStatusCode(status)
+    catalog.update(f"nostalgia_pack:{game}", maps)
+    return maps
 
 
+@http.resource("botb")
 async def get_botb(difficulty: int) -> list:
-    async with http.client.get(f"{API_BASE_URL}/maps?format=52&filter={difficulty}") as resp:
-        return await resp.json()
+    status, maps = await http.revalidating_get(f"{API_BASE_URL}/maps?format=52&filter={difficulty}")
+    if status >= 400:
+        raise ErrorStatusCode(status)
+    catalog.update(f"botb:{difficulty}", maps)
+    return maps
+
+
+@http.resource("retro_maps")
+async def fetch_retro_maps() -> dict:
+    status, maps = await http.revalidating_get(f"{API_BASE_URL}/maps/retro")
+    if status >= 400:
+        raise ErrorStatusCode(status)
+    return maps
 
 
 async def get_retro_maps(as_list: bool = True) -> list:
-    async with http.client.get(f"{API_BASE_URL}/maps/retro") as resp:
-        maps = await resp.json()
-        if not as_list:
-            return maps
-        return [
-            {**map_data, "game": game}
-            for game in maps
-            for category in maps[game]
-            for map_data in maps[game][category]
-        ]
-
-
-async def get_map_completions(map_code: str, page: int) -> list:
-    qparams = {page: page}
+    maps = await fetch_retro_maps()
+    if not as_list:
+        return maps
+    return [
+        {**map_data, "game": game}
+        for game in maps
+        for category in maps[game]
+        for map_data in maps[game][category]
+    ]
+
+
+# Navigating through a paginator cancels the requests for pages the user skipped past
+@http.resource("map_completions", cancellable=True)
+async def get_map_completions(map_code: str, page: int) -> dict:
+    qparams = {"page": page}
     async with http.client.get(f"{API_BASE_URL}/maps/{map_code}/completions?{urllib.parse.urlencode(qparams)}") as resp:
+        if not resp.ok:
+            raise ErrorStatusCode(resp.status)
         return await resp.json()
 
 
+@http.resource("formats")
 async def get_formats() -> list[dict]:
-    qparams = {"signature": sign(b"")}
+    qparams = {"signature": await sign(b"")}
     async with http.client.get(f"{API_BASE_URL}/formats/bot?{urllib.parse.urlencode(qparams)}") as resp:
-        return await resp.json()
+        if not resp.ok:
+            raise ErrorStatusCode(resp.status)
+        formats = await resp.json()
+        format_registry.update(formats)
+        return formats
+
+
+async def get_format_registry() -> FormatRegistry:
+    """The format registry. Only fetches formats if they were never loaded, it's refreshed in the background."""
+    if not format_registry.loaded:
+        await get_formats()
+    return format_registry
 
 
+async def refresh_formats() -> None:
+    """Keeps the format registry up to date in the background, so commands don't have to wait for formats."""
+    await http.ready.wait()
+    while True:
+        try:
+            # Forced, or formats fetched less than a TTL ago would be served from memory
+            await get_formats.refresh()
+        except Exception as exc:
+            print(f"{yellow('[Formats]')} Couldn't refresh formats: {type(exc).__name__}")
+        # By then the response in the SQLite cache is expired too, so it's fetched from the API
+        await asyncio.sleep(http.cache_policies["formats"]["ttl"])
+
+
+@http.resource("config")
 async def get_maplist_config() -> dict:
     async with http.client.get(f"{API_BASE_URL}/config") as resp:
         if not resp.ok:
@@ -116,6 +162,7 @@ async def get_maplist_config() -> dict:
         return await resp.json()
 
 
+@http.resource("leaderboard", cancellable=True)
 async def get_leaderboard(lb_type: str, game_format: Format, page: int) -> dict:
     fmt = {
         "Maplist": "1",
@@ -130,15 +177,16 @@ async def get_leaderboard(lb_type: str, game_format: Format, page: int) -> dict:
     }.get(lb_type, "points")
 
     qstring = f"value={value}&format={fmt}&page={page}"
-    async with http.client.get(f"{API_BASE_URL}/maps/leaderboard?{qstring}") as resp:
-        if not resp.ok:
-            raise ErrorStatusCode(resp.status)
-        return await resp.json()
+    status, leaderboard = await http.revalidating_get(f"{API_BASE_URL}/maps/leaderboard?{qstring}")
+    if status >= 400:
+        raise ErrorStatusCode(status)
+    return leaderboard
 
 
+@http.resource("user", key=lambda uid, no_load_oak=False: (uid, no_load_oak))
 async def get_maplist_user(uid: int, no_load_oak: bool = False) -> dict:
     message = f"{uid}{no_load_oak}"
-    signature = sign(message.encode())
+    signature = await sign(message.encode())
     qparams = {"signature": signature, "no_load_oak": str(no_load_oak)}
     url = f"{API_BASE_URL}/users/{uid}/bot?{urllib.parse.urlencode(qparams)}"
     async with http.client.get(url) as resp:
@@ -149,14 +197,82 @@ async def get_maplist_user(uid: int, no_load_oak: bool = False) -> dict:
         return await resp.json()
 
 
+@http.resource("submitter", key=lambda uid: uid)
+async def get_submitter(uid: int) -> dict | None:
+    """
+    What submissions need to know about a user: their permissions and whether they've read the rules.
+    :return: None if the user isn't on the Maplist.
+    """
+    try:
+        ml_user = await get_maplist_user(uid, no_load_oak=True)
+    except MaplistResNotFound:
+        return None
+    return {
+        "permissions": ml_user["permissions"],
+        "has_seen_popup": ml_user["has_seen_popup"],
+    }
+
+
+async def invalidate_user(uid: int) -> None:
+    """Forgets cached data about a user, after it's been changed."""
+    http.memory_cache.delete(("submitter", uid))
+    for no_load_oak in (True, False):
+        qparams = {"no_load_oak": str(no_load_oak)}
+        await http.client.cache.delete_url(f"{API_BASE_URL}/users/{uid}/bot?{urllib.parse.urlencode(qparams)}")
+
+
+@http.resource("user_completions", key=lambda uid, page=1: (uid, page), cancellable=True)
 async def get_user_completions(uid: int, page: int = 1) -> dict:
-    qparams = {page: page}
+    qparams = {"page": page}
     async with http.client.get(f"{API_BASE_URL}/users/{uid}/completions?{urllib.parse.urlencode(qparams)}") as resp:
         if not resp.ok:
             raise ErrorStatusCode(resp.status)
         return await resp.json()
 
 
+async def raise_for_submission(resp: aiohttp.ClientResponse) -> None:
+    if resp.status == 400:
+        raise BadRequest(await resp.json())
+    if not resp.ok:
+        raise ErrorStatusCode(resp.status)
+
+
+async def upload_with_proofs(
+        url: str,
+        signed_prefix: bytes,
+        data_str: str,
+        proofs: list[discord.Attachment],
+        field_name: str,
+) -> None:
+    """
+    Submits data along with some proof images. The images are downloaded concurrently and streamed
+    into the request as they come, the signature is computed along the way and sent last.
+    :param url: The URL to POST to.
+    :param signed_prefix: What's signed before the contents of the proofs.
+    :param data_str: The data to send along with its signature.
+    :param proofs: The proof images, in the order they're signed.
+    :param field_name: Name of the proof fields, formatted with their index.
+    """
+    contents_hash = partial_sign(signed_prefix)
+
+    async def signed_data() -> str:
+        return json.dumps({"data": data_str, "signature": await finish_sign(contents_hash)})
+
+    async with AttachmentStreams(http.cdn_client, proofs, contents_hash) as streams:
+        form_data = FormData()
+        for i, file in enumerate(proofs):
+            form_data.add_field(
+                field_name.format(i),
+                streams.stream(i),
+                filename=file.filename,
+                content_type=file.content_type,
+            )
+        form_data.add_field("data", DeferredPayload(signed_data))
+
+        async with http.client.post(url, data=form_data) as resp:
+            await raise_for_submission(resp)
+
+
 async def submit_map(
         user: discord.User,
         code: str,
@@ -177,32 +293,22 @@ async def submit_map(
         "proposed": proposed_diff,
     }
 
-    form_data = None
-    json_data = None
+    data_str = json.dumps(data)
     if proof is None:
-        json_data = {
-            "data": json.dumps(data),
-            "signature": sign(json.dumps(data).encode())
-        }
-    else:
-        data_str = json.dumps(data)
-        proof_contents = await proof.read()
-        signature = sign(data_str.encode() + proof_contents)
-
-        form_data = FormData()
-        form_data.add_field(
-            "proof_completion",
-            io.BytesIO(proof_contents),
-            filename=proof.filename,
-            content_type=proof.content_type,
-        )
-        form_data.add_field("data", json.dumps({"data": data_str, "signature": signature}))
-
-    async with http.client.post(f"{API_BASE_URL}/maps/submit/bot", data=form_data, json=json_data) as resp:
-        if resp.status == 400:
-            raise BadRequest(await resp.json())
-        if not resp.ok:
-            raise ErrorStatusCode(resp.status)
+        async with http.client.post(
+                f"{API_BASE_URL}/maps/submit/bot",
+                json={"data": data_str, "signature": await sign(data_str.encode())},
+        ) as resp:
+            await raise_for_submission(resp)
+        return
+
+    await upload_with_proofs(
+        f"{API_BASE_URL}/maps/submit/bot",
+        data_str.encode(),
+        data_str,
+        [proof],
+        "proof_completion",
+    )
 
 
 async def submit_run(
@@ -232,25 +338,13 @@ async def submit_run(
         "video_proof_url": vproof_url,
     }
     data_str = json.dumps(data)
-    contents_hash = partial_sign((map_id+data_str).encode())
-
-    form_data = FormData()
-    for i, file in enumerate(proofs):
-        fcontents = await file.read()
-        contents_hash = partial_sign(fcontents, current=contents_hash)
-        form_data.add_field(
-            f"proof_completion[{i}]",
-            io.BytesIO(fcontents),
-            filename=file.filename,
-            content_type=file.content_type,
-        )
-    form_data.add_field("data", json.dumps({"data": data_str, "signature": finish_sign(contents_hash)}))
-
-    async with http.client.post(f"{API_BASE_URL}/maps/{map_id}/completions/submit/bot", data=form_data) as resp:
-        if resp.status == 400:
-            raise BadRequest(await resp.json())
-        if not resp.ok:
-            raise ErrorStatusCode(resp.status)
+    await upload_with_proofs(
+        f"{API_BASE_URL}/maps/{map_id}/completions/submit/bot",
+        (map_id+data_str).encode(),
+        data_str,
+        proofs,
+        "proof_completion[{}]",
+    )
 
 
 async def read_rules(user: discord.User) -> None:
@@ -262,12 +356,13 @@ async def read_rules(user: discord.User) -> None:
         },
     }
     data_str = json.dumps(data)
-    signature = sign(data_str.encode())
+    signature = await sign(data_str.encode())
 
     payload = {"data": data_str, "signature": signature}
     async with http.client.put(f"{API_BASE_URL}/read-rules/bot", json=payload) as resp:
         if not resp.ok:
             raise ErrorStatusCode(resp.status)
+    await invalidate_user(user.id)
 
 
 async def set_oak(user: discord.User, oak: str) -> None:
@@ -280,12 +375,13 @@ async def set_oak(user: discord.User, oak: str) -> None:
         "oak": oak,
     }
     data_str = json.dumps(data)
-    signature = sign(f"{user.id}{data_str}".encode())
+    signature = await sign(f"{user.id}{data_str}".encode())
 
     payload = {"data": data_str, "signature": signature}
     async with http.client.put(f"{API_BASE_URL}/users/{user.id}/bot", json=payload) as resp:
         if not resp.ok:
             raise ErrorStatusCode(resp.status)
+    await invalidate_user(user.id)
 
 
 async def accept_run(who: discord.User, run_id: int) -> None:
@@ -297,7 +393,7 @@ async def accept_run(who: discord.User, run_id: int) -> None:
         },
     }
     data_str = json.dumps(data)
-    signature = sign(f"{run_id}{data_str}".encode())
+    signature = await sign(f"{run_id}{data_str}".encode())
 
     payload = {"data": data_str, "signature": signature}
     async with http.client.put(f"{API_BASE_URL}/completions/{run_id}/accept/bot", json=payload) as resp:
@@ -322,7 +418,7 @@ async def reject_run(who: discord.User, run_id: int) -> None:
         },
     }
     data_str = json.dumps(data)
-    signature = sign(f"{run_id}{data_str}".encode())
+    signature = await sign(f"{run_id}{data_str}".encode())
 
     payload = {"data": data_str, "signature": signature}
     async with http.client.delete(f"{API_BASE_URL}/completions/{run_id}/bot", json=payload) as resp:
@@ -353,7 +449,7 @@ async def reject_map(who: discord.User, message_id: int) -> None:
         "message_id": str(message_id),
     }
     data_str = json.dumps(data)
-    signature = sign(data_str.encode())
+    signature = await sign(data_str.encode())
 
     payload = {"data": data_str, "signature": signature}
     async with http.client.delete(f"{API_BASE_URL}/maps/submit/bot", json=payload) as resp:
@@ -369,6 +465,8 @@ async def reject_map(who: discord.User, message_id: int) -> None:
             raise ErrorStatusCode(resp.status, errors=errors)
 
 
+# Results of outdated autocomplete queries are thrown away
+@http.resource("search", cancellable=True)
 async def search_maps(query: str) -> list[dict]:
     qparams = {"q": query, "type": "map"}
     async with http.client.get(f"{API_BASE_URL}/search?{urllib.parse.urlencode(qparams)}") as resp:
@@ -377,8 +475,60 @@ async def search_maps(query: str) -> list[dict]:
         return []
 
 
+async def suggest_maps(query: str, prefetch: int = 2) -> list[dict]:
+    """
+    Maps to suggest in autocompletes, from the local index.
+    Only searches through the API if the index has nothing, e.g. if it hasn't been loaded yet.
+    :param query: What the user typed so far.
+    :param prefetch: How many of the top suggestions to fetch in advance, since the command
+                     the user is typing will likely ask for one of them.
+    """
+    if not (results := map_index.search(query)):
+        results = await search_maps(query)
+    for map_data in results[:prefetch]:
+        http.prefetch(get_maplist_map, map_data["code"])
+    return results
+
+
+def fetch_catalog_list(source: str) -> Awaitable[list[dict]]:
+    """Fetches a list of the catalog, which updates it."""
+    name, _sep, arg = source.partition(":")
+    fetch = {
+        "maplist": get_maplist,
+        "experts": get_experts,
+        "botb": get_botb,
+        "nostalgia_pack": get_nostalgia_pack,
+    }[name]
+    return fetch(int(arg)) if arg else fetch()
+
+
+async def get_catalog_list(source: str) -> tuple[list[dict], float | None]:
+    """
+    A list from the catalog. It's only fetched if it was never synced.
+    :return: The maps in the list, and when it was synced.
+    """
+    if (maps := catalog.get(source)) is not None:
+        return maps, catalog.synced_at(source)
+    maps = await fetch_catalog_list(source)
+    return maps, catalog.synced_at(source)
+
+
+async def sync_catalog() -> None:
+    """Fetches every list of the catalog. Lists that fail to load are skipped."""
+    sources = [
+        "maplist",
+        "experts",
+        *[f"botb:{difficulty}" for difficulty in range(5)],
+        *[f"nostalgia_pack:{game}" for game in range(len(get_args(NostalgiaPackGame)))],
+    ]
+    await asyncio.gather(
+        *[fetch_catalog_list(source) for source in sources],
+        return_exceptions=True,
+    )
+
+
 async def get_linked_role_updates() -> list[dict]:
-    qparams = {"signature": sign(b"")}
+    qparams = {"signature": await sign(b"")}
     async with http.client.get(f"{API_BASE_URL}/roles/achievement/updates/bot?{urllib.parse.urlencode(qparams)}") as resp:
         if not resp.ok:
             return []
@@ -386,6 +536,6 @@ async def get_linked_role_updates() -> list[dict]:
 
 
 async def confirm_linked_role_updates() -> None:
-    qparams = {"signature": sign(b"")}
+    qparams = {"signature": await sign(b"")}
     async with http.client.post(f"{API_BASE_URL}/roles/achievement/updates/bot?{urllib.parse.urlencode(qparams)}") as resp:
         pass
@@ -4,8 +4,9 @@ import bot.utils.http
 http = bot.utils.http
 
 
+@http.resource("nk_user")
 async def get_btd6_user(oak: str) -> dict | None:
-    async with http.client.get(f"https://data.ninjakiwi.com/btd6/users/{oak}") as resp:
+    async with http.nk_client.get(f"https://data.ninjakiwi.com/btd6/users/{oak}") as resp:
         if not resp.ok:
             return None
         data = await resp.json()
@@ -14,8 +15,9 @@ async def get_btd6_user(oak: str) -> dict | None:
         return data["body"]
 
 
+@http.resource("nk_custom_map")
 async def get_btd6_custom_map(code: str) -> dict | None:
-    async with http.client.get(f"https://data.ninjakiwi.com/btd6/maps/map/{code}") as resp:
+    async with http.nk_client.get(f"https://data.ninjakiwi.com/btd6/maps/map/{code}") as resp:
         if not resp.ok:
             return None
         data = await resp.json()
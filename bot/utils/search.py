@@ -0,0 +1,141 @@
+import heapq
+import re
+from bisect import bisect_left
+from collections.abc import Hashable
+from typing import Any
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i+3] for i in range(len(padded)-2)}
+
+
+class SearchIndex:
+    """
+    In-memory index to look up documents by any of their terms, with prefix,
+    substring and fuzzy (trigram similarity) matching.
+    Every document has a key, some terms to be found by and a rank: documents with
+    equally good matches are sorted by it, lowest first.
+    """
+    def __init__(self, min_similarity: float = 0.3):
+        self.min_similarity = min_similarity
+        self.docs: dict[Hashable, tuple[Any, list[str], float]] = {}
+        # Terms are shared between the documents that have them.
+        # They're sorted lazily, so adding many documents at once doesn't insert them one by one.
+        self.sorted_terms: list[str] = []
+        self.is_sorted = True
+        self.term_keys: dict[str, set[Hashable]] = {}
+        self.term_trigrams: dict[str, int] = {}
+        self.trigrams: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.docs
+
+    def upsert(self, key: Hashable, doc: Any, terms: list[str], rank: float = 0) -> None:
+        terms = list(dict.fromkeys(term for t in terms if (term := normalize(t))))
+        if key in self.docs:
+            _doc, old_terms, _rank = self.docs[key]
+            if old_terms == terms:
+                self.docs[key] = (doc, terms, rank)
+                return
+            self.remove(key)
+
+        self.docs[key] = (doc, terms, rank)
+        for term in terms:
+            if term not in self.term_keys:
+                self.sorted_terms.append(term)
+                self.is_sorted = False
+                self.term_keys[term] = set()
+                term_tris = trigrams(term)
+                self.term_trigrams[term] = len(term_tris)
+                for tri in term_tris:
+                    self.trigrams.setdefault(tri, set()).add(term)
+            self.term_keys[term].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        if key not in self.docs:
+            return
+        _doc, terms, _rank = self.docs.pop(key)
+        self._sort_terms()
+        for term in terms:
+            self.term_keys[term].discard(key)
+            if self.term_keys[term]:
+                continue
+            del self.term_keys[term]
+            del self.term_trigrams[term]
+            del self.sorted_terms[bisect_left(self.sorted_terms, term)]
+            for tri in trigrams(term):
+                self.trigrams[tri].discard(term)
+                if not self.trigrams[tri]:
+                    del self.trigrams[tri]
+
+    def _sort_terms(self) -> None:
+        if not self.is_sorted:
+            self.sorted_terms.sort()
+            self.is_sorted = True
+
+    def get(self, key: Hashable) -> Any | None:
+        return self.docs[key][0] if key in self.docs else None
+
+    def lookup(self, term: str) -> list[Any]:
+        """:return: The documents with exactly this term, lowest rank first."""
+        keys = sorted(self.term_keys.get(normalize(term), ()), key=lambda k: self.docs[k][2])
+        return [self.docs[k][0] for k in keys]
+
+    def search(self, query: str, limit: int = 25) -> list[Any]:
+        """
+        :param query: What to search for. If empty, returns the documents with the lowest rank.
+        :param limit: Maximum amount of results.
+        :return: The matching documents, best match first.
+        """
+        query = normalize(query)
+        if not query:
+            keys = heapq.nsmallest(limit, self.docs, key=lambda k: self.docs[k][2])
+            return [self.docs[k][0] for k in keys]
+
+        self._sort_terms()
+        # Lower is better: exact matches, then prefixes, then substrings, then similar terms.
+        scores: dict[Hashable, float] = {}
+
+        def score(term: str, term_score: float) -> None:
+            for key in self.term_keys[term]:
+                if term_score < scores.get(key, 4):
+                    scores[key] = term_score
+
+        idx = bisect_left(self.sorted_terms, query)
+        while idx < len(self.sorted_terms) and self.sorted_terms[idx].startswith(query):
+            score(self.sorted_terms[idx], 0 if self.sorted_terms[idx] == query else 1)
+            idx += 1
+        if len(scores) >= limit:
+            # Anything else would be a worse match
+            return self._best(scores, limit)
+
+        query_tris = trigrams(query)
+        shared: dict[str, int] = {}
+        for tri in query_tris:
+            for term in self.trigrams.get(tri, ()):
+                shared[term] = shared.get(term, 0) + 1
+        for term, common in shared.items():
+            # Similarity can't be higher than this, no need to compute it
+            if common < self.min_similarity * len(query_tris):
+                continue
+            # A substring has all the trigrams of the query, except the ones padded at its start & end.
+            if common >= len(query_tris) - 3 and query in term:
+                score(term, 2)
+                continue
+            similarity = common / (len(query_tris) + self.term_trigrams[term] - common)
+            if similarity >= self.min_similarity:
+                score(term, 3 - similarity)
+
+        return self._best(scores, limit)
+
+    def _best(self, scores: dict[Hashable, float], limit: int) -> list[Any]:
+        best = heapq.nsmallest(limit, scores, key=lambda k: (scores[k], self.docs[k][2]))
+        return [self.docs[k][0] for k in best]
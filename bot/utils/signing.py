@@ -0,0 +1,148 @@
+import asyncio
+import base64
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, utils, rsa, ed25519
+
+
+# Signature methods & vulnerabilities: https://en.wikipedia.org/wiki/Digital_signature#Method
+# Good article on RSA signatures: https://cryptobook.nakov.com/digital-signatures/rsa-signatures
+class Signer(ABC):
+    """Signs messages with the bot's private key. Blocking, see SigningPool to use it from the event loop."""
+    algorithm: str
+
+    @abstractmethod
+    def sign(self, message: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def sign_digest(self, digest: bytes) -> bytes:
+        """Signs a message that has already been hashed with SHA-256."""
+        pass
+
+
+class RSASigner(Signer):
+    """RSA-PSS with SHA-256."""
+    algorithm = "RSA-PSS"
+
+    def __init__(self, private_key: rsa.RSAPrivateKey):
+        self.private_key = private_key
+
+    def sign(self, message: bytes) -> bytes:
+        # https://cryptography.io/en/latest/hazmat/primitives/asymmetric/rsa/#signing
+        return self.private_key.sign(
+            message,
+            padding=padding.PSS(
+                padding.MGF1(hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH,
+            ),
+            algorithm=hashes.SHA256(),
+        )
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        sha256 = hashes.SHA256()
+        return self.private_key.sign(
+            digest,
+            padding.PSS(
+                padding.MGF1(sha256),
+                salt_length=padding.PSS.MAX_LENGTH,
+            ),
+            utils.Prehashed(sha256),
+        )
+
+
+class Ed25519Signer(Signer):
+    """
+    Ed25519, a lot cheaper than RSA for the same security.
+    It has no prehashed mode, so digests are signed as they are: the verifier
+    must hash the message with SHA-256 and verify the signature against that.
+    """
+    algorithm = "Ed25519"
+
+    def __init__(self, private_key: ed25519.Ed25519PrivateKey):
+        self.private_key = private_key
+
+    def sign(self, message: bytes) -> bytes:
+        return self.private_key.sign(message)
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        return self.private_key.sign(digest)
+
+
+def load_signer(pem: bytes, password: bytes | None = None) -> Signer:
+    """Picks the signer according to the type of the key."""
+    private_key = serialization.load_pem_private_key(pem, password=password)
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return RSASigner(private_key)
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return Ed25519Signer(private_key)
+    raise ValueError(f"Unsupported private key type: {type(private_key).__name__}")
+
+
+# Each worker process loads its own copy of the key, since keys can't be pickled.
+_worker_signer: Signer | None = None
+
+
+def _init_worker(pem: bytes, password: bytes | None) -> None:
+    global _worker_signer
+    _worker_signer = load_signer(pem, password)
+
+
+def _sign_in_worker(message: bytes, prehashed: bool) -> bytes:
+    return _worker_signer.sign_digest(message) if prehashed else _worker_signer.sign(message)
+
+
+class SigningPool:
+    """
+    Runs signatures in a pool of threads or processes, so they don't block the event loop.
+    Threads are enough as long as the crypto backend releases the GIL while signing,
+    processes always run in parallel but pay for sending messages back and forth.
+    """
+    def __init__(
+            self,
+            pem: bytes,
+            password: bytes | None = None,
+            workers: int = 2,
+            processes: bool = False,
+    ):
+        self.signer = load_signer(pem, password)
+        self.executor: Executor
+        if processes:
+            self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(pem, password))
+        else:
+            self.executor = ThreadPoolExecutor(workers, thread_name_prefix="signer")
+        self.processes = processes
+        self.signatures = 0
+        self.total_time = 0.0
+
+    def _sign(self, message: bytes, prehashed: bool) -> bytes:
+        return self.signer.sign_digest(message) if prehashed else self.signer.sign(message)
+
+    async def _run(self, message: bytes, prehashed: bool) -> str:
+        start = time.perf_counter()
+        sign_cb = _sign_in_worker if self.processes else self._sign
+        signature = await asyncio.get_running_loop().run_in_executor(self.executor, sign_cb, message, prehashed)
+        self.signatures += 1
+        self.total_time += time.perf_counter() - start
+        return base64.b64encode(signature).decode()
+
+    async def sign(self, message: bytes) -> str:
+        """:return: The base64 encoded signature."""
+        return await self._run(message, False)
+
+    async def sign_digest(self, digest: bytes) -> str:
+        """:return: The base64 encoded signature of an already hashed message."""
+        return await self._run(digest, True)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, str | int | float]:
+        return {
+            "algorithm": self.signer.algorithm,
+            "pool": "processes" if self.processes else "threads",
+            "signatures": self.signatures,
+            "avg_ms": self.total_time / self.signatures * 1000 if self.signatures else 0.0,
+        }
@@ -0,0 +1,87 @@
+import asyncio
+import aiohttp
+import aiohttp.payload
+import discord
+from collections.abc import AsyncIterator, Awaitable, Callable
+from cryptography.hazmat.primitives import hashes
+from typing import Any
+
+
+class DeferredPayload(aiohttp.payload.Payload):
+    """
+    A text payload that's only built when it's about to be sent, e.g. the signature
+    of the parts of a multipart body that come before it.
+    """
+    def __init__(self, value_cb: Callable[[], Awaitable[str]], **kwargs: Any):
+        super().__init__(value_cb, content_type="text/plain", **kwargs)
+
+    @property
+    def size(self) -> None:
+        return None
+
+    def decode(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        raise TypeError("A deferred payload can't be decoded before it's sent")
+
+    async def write(self, writer) -> None:
+        await writer.write((await self._value()).encode(self._encoding or "utf-8"))
+
+
+class AttachmentStreams:
+    """
+    Downloads some attachments concurrently and hands out their contents as chunk streams,
+    adding each chunk to a running hash as it's consumed. Every download can only get
+    a few chunks ahead of its reader, so memory stays bounded whatever the size of the files.
+    Streams must be consumed in order for the hash to match the contents.
+    """
+    def __init__(
+            self,
+            session: aiohttp.ClientSession,
+            attachments: list[discord.Attachment],
+            digest: hashes.Hash,
+            chunk_size: int = 64 * 1024,
+            buffer_chunks: int = 8,
+    ):
+        self.session = session
+        self.attachments = attachments
+        self.digest = digest
+        self.chunk_size = chunk_size
+        self.queues: list[asyncio.Queue[bytes | BaseException | None]] = [
+            asyncio.Queue(maxsize=buffer_chunks) for _ in attachments
+        ]
+        self.tasks: list[asyncio.Task] = []
+
+    async def __aenter__(self) -> "AttachmentStreams":
+        self.tasks = [
+            asyncio.create_task(self._download(attachment, queue))
+            for attachment, queue in zip(self.attachments, self.queues)
+        ]
+        return self
+
+    async def __aexit__(self, *_exc_info) -> None:
+        # If the upload failed halfway, the downloads would hang on their full queues.
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def _download(
+            self,
+            attachment: discord.Attachment,
+            queue: asyncio.Queue[bytes | BaseException | None],
+    ) -> None:
+        try:
+            async with self.session.get(attachment.url) as resp:
+                resp.raise_for_status()
+                async for chunk in resp.content.iter_chunked(self.chunk_size):
+                    await queue.put(chunk)
+            await queue.put(None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await queue.put(exc)
+
+    async def stream(self, index: int) -> AsyncIterator[bytes]:
+        while (chunk := await self.queues[index].get()) is not None:
+            if isinstance(chunk, BaseException):
+                raise chunk
+            self.digest.update(chunk)
+            yield chunk
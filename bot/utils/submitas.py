@@ -0,0 +1,55 @@
+from bot.utils.search import SearchIndex, normalize
+
+
+def submit_as_choices(retro_maps: dict, formats: list[dict]) -> list[tuple[str, str]]:
+    """
+    Everything a map can be submitted as.
+    :param retro_maps: Retro maps, by game and category.
+    :param formats: The formats of the Maplist.
+    :return: The name and value of every choice.
+    """
+    choices = [
+        (f"Nostalgia Pack / {map_data['name']}", f"11;{map_data['id']}")
+        for game in retro_maps
+        for category in retro_maps[game]
+        for map_data in retro_maps[game][category]
+    ]
+    for format_data in formats:
+        if format_data["proposed_difficulties"]:
+            for i, choice_name in enumerate(format_data["proposed_difficulties"]):
+                choices.append((f"{format_data['name']} ~ {choice_name}", f"{format_data['id']};{i}"))
+    return choices
+
+
+def word_suffixes(text: str) -> list[str]:
+    """All the ways to write the text dropping some words at its start, so words can be searched by prefix."""
+    words = normalize(text).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class SubmitAsMatcher:
+    """Index of the submit_as choices. It's only rebuilt when formats or retro maps change."""
+    def __init__(self):
+        self.index = SearchIndex()
+        self.retro_maps: dict | None = None
+        self.formats: list[dict] | None = None
+
+    def update(self, retro_maps: dict, formats: list[dict]) -> bool:
+        """:return: Whether the index had to be rebuilt."""
+        if retro_maps is self.retro_maps and formats is self.formats:
+            return False
+        # Copies of the same data, e.g. a cached payload served as stale
+        changed = retro_maps != self.retro_maps or formats != self.formats
+        self.retro_maps = retro_maps
+        self.formats = formats
+        if not changed:
+            return False
+
+        self.index = SearchIndex()
+        for i, (name, value) in enumerate(submit_as_choices(retro_maps, formats)):
+            self.index.upsert(value, (name, value), word_suffixes(name), rank=i)
+        return True
+
+    def match(self, query: str, limit: int = 10) -> list[tuple[str, str]]:
+        """:return: The name and value of the best choices."""
+        return self.index.search(query, limit=limit)
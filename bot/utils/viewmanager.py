@@ -0,0 +1,96 @@
+import discord
+from collections import OrderedDict
+from typing import Any
+from config import VIEWS_MAX_LIVE
+from bot.utils.cache import approx_size
+
+
+class ViewManager:
+    """
+    Keeps track of the views attached to the bot's messages. discord.py keeps views without
+    a timeout forever, along with everything they hold (e.g. the pages a paginator downloaded).
+    There's at most one live view per message: attaching a new one retires the previous one.
+    Past max_views, the least recently used views are retired too, and their components stop working.
+    """
+    def __init__(self, max_views: int):
+        self.max_views = max_views
+        # Original interaction ID -> view attached to its response & IDs of the payloads it holds
+        self.views: OrderedDict[int, tuple[discord.ui.View, list[int]]] = OrderedDict()
+        # Payload ID -> payload, its size & how many views hold it. Views showing the same
+        # payloads (e.g. a paginator going back and forth) don't have to measure them again.
+        self.payloads: dict[int, list] = {}
+        self.size = 0
+        self.retired = 0
+        self.evicted = 0
+
+    def attach(
+            self,
+            interaction: discord.Interaction,
+            view: discord.ui.View | None,
+            payloads: list[Any] | None = None,
+    ) -> None:
+        """
+        Registers the view attached to the response of an interaction. Call it once the
+        response has been edited, so the previous view keeps working if that failed.
+        :param interaction: The interaction whose response the view is attached to.
+        :param view: The view. If None, the previous one is just retired.
+        :param payloads: What the view holds, to account for its memory.
+        """
+        if (previous := self.views.get(interaction.id)) and previous[0] is not view:
+            if view is not None:
+                # Items moved to the new view (e.g. tabs) shouldn't be removed from the view store with it
+                for item in previous[0].children:
+                    if item in view.children:
+                        previous[0].remove_item(item)
+            self.retire(interaction)
+        if view is None:
+            return
+
+        if interaction.id in self.views:
+            self._release(self.views[interaction.id][1])
+        self.views[interaction.id] = (view, self._hold(payloads or []))
+        self.views.move_to_end(interaction.id)
+
+        while len(self.views) > self.max_views:
+            _k, (evicted, payload_ids) = self.views.popitem(last=False)
+            self._release(payload_ids)
+            evicted.stop()
+            self.evicted += 1
+
+    def retire(self, interaction: discord.Interaction) -> None:
+        """Stops the view attached to the response of an interaction, if it has one."""
+        if (entry := self.views.pop(interaction.id, None)) is None:
+            return
+        view, payload_ids = entry
+        self._release(payload_ids)
+        view.stop()
+        self.retired += 1
+
+    def _hold(self, payloads: list[Any]) -> list[int]:
+        payload_ids = []
+        for payload in payloads:
+            if (held := self.payloads.get(id(payload))) is None:
+                held = self.payloads[id(payload)] = [payload, approx_size(payload), 0]
+                self.size += held[1]
+            held[2] += 1
+            payload_ids.append(id(payload))
+        return payload_ids
+
+    def _release(self, payload_ids: list[int]) -> None:
+        for payload_id in payload_ids:
+            held = self.payloads[payload_id]
+            held[2] -= 1
+            if held[2] == 0:
+                del self.payloads[payload_id]
+                self.size -= held[1]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "views": len(self.views),
+            "bytes": self.size,
+            "retired": self.retired,
+            "evicted": self.evicted,
+        }
+
+
+view_manager = ViewManager(VIEWS_MAX_LIVE)
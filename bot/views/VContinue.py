@@ -0,0 +1,44 @@
+import asyncio
+import discord
+from bot.utils.handlers import handle_error
+from collections.abc import Awaitable, Callable
+
+
+class VContinue(discord.ui.View):
+    """Lets the user resume a command that couldn't answer in time, with a fresh interaction."""
+    def __init__(
+            self,
+            interaction: discord.Interaction,
+            continue_cb: Callable[[discord.Interaction], Awaitable[None]],
+            # The interaction's token expires after 15 minutes, it can't be deleted after that anyway.
+            timeout: float = 60 * 15,
+    ):
+        super().__init__(timeout=timeout)
+        self.og_interaction = interaction
+        self.continue_cb = continue_cb
+        self.resumed = False
+
+    async def delete_og_interaction(self):
+        """Best effort, the message might be gone already or the token expired."""
+        try:
+            og_resp = await self.og_interaction.original_response()
+            await og_resp.delete()
+        except discord.HTTPException:
+            pass
+
+    async def interaction_check(self, _i: discord.Interaction, /) -> bool:
+        return not self.resumed
+
+    @discord.ui.button(
+        label="Continue",
+        style=discord.ButtonStyle.blurple,
+    )
+    async def resume(self, interaction: discord.Interaction, _btn: discord.ui.Button):
+        self.resumed = True
+        self.stop()
+        delete_task = asyncio.create_task(self.delete_og_interaction())
+        try:
+            await self.continue_cb(interaction)
+        except Exception as exc:
+            await handle_error(interaction, exc)
+        await delete_task
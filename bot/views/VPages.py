@@ -1,8 +1,11 @@
+import asyncio
 import discord
 from bot.types import EmbedPage
 from .components import PageSelector
 from bot.utils.discordutils import composite_views
+from bot.utils.viewmanager import view_manager
 from collections.abc import Callable
+from typing import Any
 
 
 class VPages(discord.ui.View):
@@ -15,10 +18,15 @@ class VPages(discord.ui.View):
             placeholder: str | Callable[[int], str] = "Other map info",
             timeout: float = None,
             autoload: bool = True,
+            payloads: list[Any] | None = None,
     ):
+        """
+        :param payloads: What the pages hold, to account for their memory (see ViewManager.attach).
+        """
         super().__init__(timeout=timeout)
         self.og_interaction = interaction
         self.pages = pages
+        self.payloads = payloads
         self.current_page = current_page
         self.placeholder = placeholder
 
@@ -50,12 +58,20 @@ class VPages(discord.ui.View):
             placeholder=self.placeholder,
             current_page=page_idx,
             timeout=self.timeout,
+            payloads=self.payloads,
         )]
         if page_view := await new_page[2].view():
             updated_view.insert(0, page_view)
-        await self.og_interaction.edit_original_response(
-            content=content,
-            embeds=embeds if embeds else [],
-            view=composite_views(*updated_view),
-        )
+        view = composite_views(*updated_view)
+        try:
+            await self.og_interaction.edit_original_response(
+                content=content,
+                embeds=embeds if embeds else [],
+                view=view,
+            )
+        except asyncio.CancelledError:
+            # The edit might have gone through anyway, and the new view must be tracked if it did
+            view_manager.attach(self.og_interaction, view, self.payloads)
+            raise
+        view_manager.attach(self.og_interaction, view, self.payloads)
 
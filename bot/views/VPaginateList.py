@@ -2,8 +2,12 @@ import discord
 from .components import OwnerButton
 from .modals import MSelectPage
 from bot.types import RequestPagesCb, PageContentBuilderCb
-from bot.utils.formulas import get_page_idxs
+from bot.utils.formulas import get_page_idxs, get_page_rows, get_read_ahead_pages
+from config import HTTP_PREFETCH_PAGES
+from collections.abc import Callable
 from bot.utils.discordutils import composite_views
+from bot.utils.viewmanager import view_manager
+from bot.utils.navigation import navigation
 from typing import Any
 
 
@@ -22,17 +26,21 @@ class VPaginateList(discord.ui.View):
             additional_views: list[discord.ui.View] | None = None,
             list_key: str | None = "entries",
             timeout: float = None,
+            prefetch_cb: Callable[[int], Any] | None = None,
     ):
         """
         :param interaction: Original interaction to edit
         :param total_pages: Total number of pages (Discord)
         :param current_page: Page the user is on
-        :param pages_saved: Number of page and contents of the page (API)
+        :param pages_saved: Number of page and contents of the page (API). If there's a request_cb,
+                            only the pages needed for the current page.
         :param items_page: Items per page (Discord)
         :param items_page_srv: Items per page (API)
-        :param request_cb: Awaitable that updates pages_saved, is called if more pages are needed.
+        :param request_cb: Awaitable that requests pages (API). Called on every navigation, so it
+                           should read them from a cache (e.g. a resource with a pages policy).
         :param message_build_cb: Callback that returns a string that will be outputted
         :param list_key: Key to access the list in the payload.
+        :param prefetch_cb: Fetches a page (API) in the background (e.g. with http.prefetch), to read ahead.
         """
         super().__init__(timeout=timeout)
 
@@ -48,6 +56,7 @@ class VPaginateList(discord.ui.View):
 
         self.list_key = list_key
         self.additional_views = additional_views
+        self.prefetch_cb = prefetch_cb
 
         if total_pages == 1:
             return
@@ -98,38 +107,23 @@ class VPaginateList(discord.ui.View):
         )
 
     def get_needed_rows(self, page: int, saved_pages: dict[int, dict | list]) -> list[Any]:
-        needed = []
-        start_idx, end_idx, req_page_start, req_page_end = get_page_idxs(page, self.items_page, self.items_page_srv)
-        for srv_page_idx in range(req_page_start, req_page_end + 1):
-            if srv_page_idx not in saved_pages:
-                continue
-            srv_page = saved_pages[srv_page_idx]
-
-            page_list = srv_page[self.list_key] if self.list_key else srv_page
-            entry_sidx = start_idx % self.items_page_srv
-            count = min(len(page_list), entry_sidx + end_idx - start_idx + 1)
-            for i in range(entry_sidx, count):
-                needed.append(page_list[i])
-            start_idx += count - entry_sidx
-
-        return needed
+        return get_page_rows(page, saved_pages, self.items_page, self.items_page_srv, self.list_key)
+
+    def read_ahead(self, page: int) -> None:
+        """Fetches the server pages the next page needs in the background, if they're not needed yet."""
+        if self.prefetch_cb is None:
+            return
+        for srv_page in get_read_ahead_pages(page, self.total_pages, self.items_page, self.items_page_srv, HTTP_PREFETCH_PAGES):
+            self.prefetch_cb(srv_page)
 
     async def go_to_page(self, page: int) -> None:
         _si, _ei, req_page_start, req_page_end = get_page_idxs(page, self.items_page, self.items_page_srv)
-        idx_to_request = [
-            pg for pg in range(req_page_start, req_page_end + 1)
-            if pg not in self.pages_saved
-        ]
-
         saved_pages = self.pages_saved
         if self.request_cb:
+            # Pages are shared in http.page_store, the view only holds the ones it's showing
             saved_pages = await self.request_cb(
-                [pg for pg in idx_to_request]
+                [pg for pg in range(req_page_start, req_page_end + 1)]
             )
-            saved_pages = {
-                **self.pages_saved,
-                **saved_pages,
-            }
 
         entries = self.get_needed_rows(page, saved_pages)
         content = self.message_build_cb(entries)
@@ -146,34 +140,48 @@ class VPaginateList(discord.ui.View):
                 additional_views=self.additional_views,
                 timeout=self.timeout,
                 list_key=self.list_key,
+                prefetch_cb=self.prefetch_cb,
             )
         ]
         if self.additional_views:
             views += self.additional_views
 
+        view = composite_views(*views)
         await self.og_interaction.edit_original_response(
             content=content if isinstance(content, str) else None,
             embed=content if isinstance(content, discord.Embed) else None,
-            view=composite_views(*views),
+            view=view,
         )
+        view_manager.attach(self.og_interaction, view, list(saved_pages.values()))
+        self.read_ahead(page)
+
+    async def navigate(self, page: int) -> None:
+        """Goes to a page, folding it with other clicks made on the message in the meantime."""
+        page = max(1, min(page, self.total_pages))
+        await navigation.navigate(self.og_interaction.id, page, self.go_to_page)
+
+    @property
+    def target_page(self) -> int:
+        """Page the message is going to, which buttons of a view still on screen move from."""
+        return navigation.target(self.og_interaction.id, self.current_page)
 
     async def modal_select_page(self, interaction: discord.Interaction):
         await interaction.response.send_modal(
-            MSelectPage(self.total_pages, self.go_to_page)
+            MSelectPage(self.total_pages, lambda page, _i: self.navigate(page))
         )
 
     async def ff_back(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer(thinking=False)
-        await self.go_to_page(1)
+        await self.navigate(1)
 
     async def page_back(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer(thinking=False)
-        await self.go_to_page(self.current_page-1)
+        await self.navigate(self.target_page-1)
 
     async def page_next(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer(thinking=False)
-        await self.go_to_page(self.current_page+1)
+        await self.navigate(self.target_page+1)
 
     async def ff_next(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer(thinking=False)
-        await self.go_to_page(self.total_pages)
+        await self.navigate(self.total_pages)
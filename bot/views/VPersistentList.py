@@ -0,0 +1,67 @@
+import discord
+from .components.PageButton import PageButton
+
+
+class VPersistentList(discord.ui.View):
+    """
+    Paginates a list gotten from a server, like VPaginateList, but without keeping any state:
+    the source, its parameters, the page and the owner are in the buttons' custom IDs.
+    Its buttons are handled by PageButton, which must be registered with Client.add_dynamic_items.
+    """
+    def __init__(
+            self,
+            source: str,
+            params: list[str],
+            current_page: int,
+            total_pages: int,
+            owner_id: int = 0,
+    ):
+        """
+        :param source: Name of the PaginatedSource of the list.
+        :param params: Parameters of the list.
+        :param current_page: Page the user is on
+        :param total_pages: Total number of pages (Discord)
+        :param owner_id: The only user who can press the buttons. 0 lets anyone press them.
+        """
+        super().__init__(timeout=None)
+
+        if total_pages == 1:
+            return
+
+        def button(action: str, page: int, **kwargs) -> PageButton:
+            return PageButton(source, action, page, owner_id, params, **kwargs)
+
+        if total_pages > 2:
+            self.add_item(button(
+                "first", 1,
+                style=discord.ButtonStyle.blurple,
+                emoji="⏮️",
+                disabled=current_page <= 1,
+            ))
+        self.add_item(button(
+            "prev", max(1, current_page-1),
+            style=discord.ButtonStyle.blurple,
+            emoji="◀️",
+            disabled=current_page <= 1,
+        ))
+
+        self.add_item(button(
+            "select", total_pages,
+            style=discord.ButtonStyle.gray,
+            label=f"{min(current_page, total_pages)} / {total_pages}",
+            disabled=total_pages <= 2,
+        ))
+
+        self.add_item(button(
+            "next", min(total_pages, current_page+1),
+            style=discord.ButtonStyle.blurple,
+            emoji="▶️",
+            disabled=current_page >= total_pages,
+        ))
+        if total_pages > 2:
+            self.add_item(button(
+                "last", total_pages,
+                style=discord.ButtonStyle.blurple,
+                emoji="⏭️",
+                disabled=current_page >= total_pages,
+            ))
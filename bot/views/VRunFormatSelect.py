@@ -2,6 +2,7 @@ import discord
 import asyncio
 from bot.types import BuildRunModalCb
 from .components.FormatSelector import FormatSelector
+from bot.utils.viewmanager import view_manager
 
 
 class VRunFormatSelect(discord.ui.View):
@@ -32,6 +33,7 @@ class VRunFormatSelect(discord.ui.View):
             format_id: int,
     ) -> None:
         modal = self.build_modal_cb(format_id)
+        view_manager.retire(self.og_interaction)
         await asyncio.gather(
             self.delete_og_interaction(),
             interaction.response.send_modal(modal),
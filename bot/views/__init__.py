@@ -3,3 +3,5 @@ from .VPaginateList import VPaginateList
 from .VRulesAccept import VRulesAccept
 from .VTryAgain import VTryAgain
 from .VRunFormatSelect import VRunFormatSelect
+from .VContinue import VContinue
+from .VPersistentList import VPersistentList
@@ -0,0 +1,106 @@
+import re
+import discord
+from bot.utils.pagination import paginated_sources
+from bot.utils.handlers import handle_error
+from bot.utils.navigation import navigation
+from ..modals import MSelectPage
+
+
+class PageButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"page:(?P<source>\w+):(?P<action>\w+):(?P<page>\d+):(?P<owner>\d+):(?P<params>[^:]*)",
+):
+    """
+    Button of a VPersistentList. Everything it needs is in its custom ID, so it keeps
+    working after a restart, and the bot doesn't keep anything in memory for it.
+    The action is only there to tell apart buttons that lead to the same page.
+    For the "select" action, the page is the total number of pages instead.
+    """
+    def __init__(
+            self,
+            source: str,
+            action: str,
+            page: int,
+            owner_id: int,
+            params: list[str],
+            **kwargs,
+    ):
+        self.source = source
+        self.action = action
+        self.page = page
+        self.owner_id = owner_id
+        self.params = params
+        super().__init__(discord.ui.Button(
+            custom_id=f"page:{source}:{action}:{page}:{owner_id}:{','.join(params)}",
+            **kwargs,
+        ))
+
+    @classmethod
+    async def from_custom_id(
+            cls,
+            _i: discord.Interaction,
+            item: discord.ui.Button,
+            match: re.Match[str],
+            /,
+    ) -> "PageButton":
+        return cls(
+            match["source"],
+            match["action"],
+            int(match["page"]),
+            int(match["owner"]),
+            match["params"].split(",") if match["params"] else [],
+        )
+
+    async def interaction_check(self, interaction: discord.Interaction, /) -> bool:
+        should_handle = self.owner_id == 0 or self.owner_id == interaction.user.id
+        if not should_handle:
+            await interaction.response.send_message(
+                content=f"The command was executed by <@{self.owner_id}>. "
+                        "Run the command yourself!",
+                ephemeral=True,
+            )
+
+        return should_handle
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        # Clicks on the same message are folded together. Custom IDs only have the page
+        # they lead to, so the last click wins.
+        if self.action == "select":
+            # The modal's interaction is the one that can edit the message
+            await interaction.response.send_modal(MSelectPage(
+                self.page,
+                lambda page, modal_interaction: navigation.navigate(
+                    interaction.message.id,
+                    page,
+                    lambda pg: self.show_page(modal_interaction, pg),
+                ),
+            ))
+            return
+
+        await interaction.response.defer(thinking=False)
+        await navigation.navigate(
+            interaction.message.id,
+            self.page,
+            lambda page: self.show_page(interaction, page),
+        )
+
+    async def show_page(self, interaction: discord.Interaction, page: int) -> None:
+        from ..VPersistentList import VPersistentList
+
+        if (source := paginated_sources.get(self.source)) is None:
+            await interaction.followup.send("This list isn't available right now, try again later!", ephemeral=True)
+            return
+
+        try:
+            content, total_pages = await source.load_page(self.params, page)
+        except Exception as exc:
+            # The page that's being shown stays there
+            await handle_error(interaction, exc, keep_response=True)
+            return
+
+        await interaction.edit_original_response(
+            content=content if isinstance(content, str) else None,
+            embed=content if isinstance(content, discord.Embed) else None,
+            view=VPersistentList(source.name, self.params, min(page, total_pages), total_pages, self.owner_id),
+        )
+        source.read_ahead(self.params, page, total_pages)
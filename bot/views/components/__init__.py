@@ -1,2 +1,3 @@
 from .PageSelector import PageSelector
-from .OwnerButton import OwnerButton
\ No newline at end of file
+from .OwnerButton import OwnerButton
+from .PageButton import PageButton
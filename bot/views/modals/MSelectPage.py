@@ -11,7 +11,7 @@ class MSelectPage(ModalBase, title="Select a Page"):
         required=True,
     )
 
-    def __init__(self, max_page: int, submit_cb: Callable[[int], Awaitable[None]]):
+    def __init__(self, max_page: int, submit_cb: Callable[[int, discord.Interaction], Awaitable[None]]):
         super().__init__()
         self.max_page = max_page
         self.submit_cb = submit_cb
@@ -21,4 +21,4 @@ class MSelectPage(ModalBase, title="Select a Page"):
 
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(thinking=False)
-        await self.submit_cb(int(self.page.value))
+        await self.submit_cb(int(self.page.value), interaction)
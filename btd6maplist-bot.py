@@ -1,4 +1,5 @@
 import os
+import asyncio
 import discord
 import logging
 from datetime import datetime
@@ -8,6 +9,8 @@ from bot import __version__
 from discord.ext import commands
 from config import TOKEN, APP_ID, DATA_PATH, WEB_BASE_URL
 from bot.utils.colors import purple
+from bot.views.components import PageButton
+from bot.utils.requests.maplist import refresh_formats
 
 
 class MaplistBot(commands.Bot):
@@ -27,6 +30,7 @@ class MaplistBot(commands.Bot):
         self.version = __version__
         self.last_restart = datetime.now()
         self.synced_tree = None
+        self.refresh_formats_task: asyncio.Task | None = None
 
     async def fetch_channel(self, channel_id: int, /):
         channel = self.get_channel(channel_id)
@@ -48,7 +52,11 @@ class MaplistBot(commands.Bot):
         for cog in cogs:
             await self.load_extension(f"bot.cogs.{cog}")
 
+        # Persistent paginators, they're handled the same on any message
+        self.add_dynamic_items(PageButton)
         await bot.utils.http.init_http_client()
+        # Not in a cog, formats are used by most of them
+        self.refresh_formats_task = asyncio.create_task(refresh_formats())
         print(f"{purple('[BTD6Maplist Bot]')} Started!")
 
     async def get_app_command(self, cmd_name: str) -> discord.app_commands.AppCommand or None:
@@ -11,6 +11,38 @@ WEB_BASE_URL = "http://localhost:3000"
 # Discord doesn't embed URLs with a file extension, and NK's map preview urls don't have one. Proxy it somehow.
 NK_PREVIEW_PROXY = lambda code: f"http://localhost:5000/map/{code}.jpg"
 
+# In-memory cache for decoded API responses, in front of the on-disk one
+HTTP_MEMORY_CACHE_MAX_ENTRIES = 512
+HTTP_MEMORY_CACHE_MAX_MB = 32
+# Pages of paginated resources (leaderboards, completions), shared by everyone browsing them
+HTTP_PAGE_STORE_MAX_ENTRIES = 256
+HTTP_PAGE_STORE_MAX_MB = 16
+# On-disk cache for API responses. It's trimmed & compacted every HTTP_CACHE_MAINTENANCE_EVERY seconds.
+HTTP_CACHE_MAX_MB = 128
+HTTP_CACHE_MAINTENANCE_EVERY = 3600
+# HTTP client profile. Timeouts are in seconds, some endpoints override them in bot/utils/http.py
+HTTP_CONNECT_TIMEOUT = 2
+HTTP_READ_TIMEOUT = 8
+HTTP_POOL_SIZE = 32  # Connections to API_BASE_URL
+HTTP_POOL_SIZE_NK = 8  # Connections to data.ninjakiwi.com
+HTTP_PREWARM_CONNECTIONS = 4
+HTTP_RETRIES = 2  # Only idempotent requests are retried
+HTTP_RETRY_BACKOFF = 0.25
+HTTP_BREAKER_THRESHOLD = 5  # Consecutive failures before failing fast
+HTTP_BREAKER_COOLDOWN = 30
+# Resources warmed in advance because they're likely to be asked for soon, e.g. maps suggested in autocompletes
+HTTP_PREFETCH_MAX_INFLIGHT = 4
+HTTP_PREFETCH_PER_MINUTE = 60
+# Server pages a paginator reads ahead when the next page the user can go to needs them
+HTTP_PREFETCH_PAGES = 1
+# Requests are signed off the event loop. Use processes if signing is still slowing down the bot with threads.
+SIGNING_WORKERS = 2
+SIGNING_PROCESSES = False
+# Paginators & other views without a timeout. Past this, the least recently used ones stop working.
+VIEWS_MAX_LIVE = 1000
+# Seconds a paginator waits for more clicks before showing the page they lead to
+VIEWS_NAVIGATION_WINDOW = 0.25
+
 # Path to store non-volatile data such as cog states
 PERSISTENT_DATA_PATH = os.path.join(os.path.expanduser("~"), "data")
 
@@ -0,0 +1,27 @@
+"""
+Needs the bot's dependencies and a config.py, run from the root of the project:
+    python -m pytest tests
+"""
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("config")
+
+import bot.cogs.LeaderboardCog as leaderboard_cog
+import bot.utils.pagination
+from bot.utils.pagination import paginated_sources
+
+
+def test_leaderboard_read_ahead(monkeypatch):
+    prefetched = []
+    monkeypatch.setattr(leaderboard_cog, "prefetch", lambda *args: prefetched.append(args))
+    monkeypatch.setattr(bot.utils.pagination, "HTTP_PREFETCH_PAGES", 1)
+    leaderboard_cog.LeaderboardCog(None)
+
+    # 20 items per page, 50 per server page: page 3 (items 41-60) needs server page 2, page 2 doesn't
+    paginated_sources["leaderboard"].read_ahead(["0", "0"], 2, 10)
+    assert prefetched == [(leaderboard_cog.get_leaderboard, "Points", "Maplist", 2)]
+
+    prefetched.clear()
+    paginated_sources["leaderboard"].read_ahead(["1", "2"], 1, 10)
+    assert prefetched == []